@@ -0,0 +1,77 @@
+"""
+Per-update latency of the online alpha band-power estimators vs the full-spectrum path.
+
+Blocks of `--block` samples are fed to each estimator; the full-spectrum
+path recomputes `compute_psd_welch` over the last window and keeps the
+8-12 Hz bins. Channels are the occipital ROI of `run_spectr_analysis.py`.
+
+    python benchmarks/bench_band_power.py --block 20
+"""
+# === project setup ===
+from pathlib import Path
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# === imports ===
+import argparse
+import time
+
+import numpy as np
+
+from src.utils.band_power import SlidingBandPower, RecursiveBandPower
+from src.utils.montage_processing import find_ch_idxs
+from src.utils.spectral_analysis import compute_psd_welch
+
+CED_FILE = PROJECT_ROOT / "resources" / "mks10.ced"
+LABELS_ROA = ["PO3", "POz", "PO4", "O1", "Oz", "O2", "Fz", "Cz", "P5", "P6"]
+BANDS = [[8, 12]]
+
+
+def latency_us(update, x, block):
+    times = []
+    for start in range(0, len(x), block):
+        t0 = time.perf_counter()
+        update(x[start:start + block])
+        times.append(time.perf_counter() - t0)
+    times = np.array(times[len(times) // 10:]) * 1E6     # без прогрева
+    return times.mean(), np.percentile(times, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--block", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--fs", type=float, default=1000)
+    args = parser.parse_args()
+
+    fs = args.fs
+    idxs_ROA = find_ch_idxs(LABELS_ROA, str(CED_FILE))
+    n_channels = 12
+    x = np.random.default_rng(0).standard_normal((int(args.seconds * fs), n_channels))
+    n_window = int(fs)
+
+    history = []
+    def full_spectrum(block):
+        history.append(block)
+        window = np.concatenate(history)[-n_window:, idxs_ROA]
+        del history[:-(n_window // len(block) + 1)]
+        freqs, psd = compute_psd_welch(window, fs, fmin=BANDS[0][0], fmax=BANDS[0][1], freq_res=1, nperseg=n_window)
+        return psd.sum(axis=1)
+
+    estimators = {
+        "full Welch spectrum": full_spectrum,
+        "SlidingBandPower": SlidingBandPower(fs, BANDS, n_channels, channels=idxs_ROA).update,
+        "RecursiveBandPower": RecursiveBandPower(fs, BANDS, n_channels, channels=idxs_ROA).update,
+    }
+    print(f"{len(idxs_ROA)} ROI channels, {args.block}-sample blocks")
+    print(f"{'estimator':<22}{'mean [us]':>12}{'p99 [us]':>12}")
+    for name, update in estimators.items():
+        mean, p99 = latency_us(update, x, args.block)
+        print(f"{name:<22}{mean:>12.0f}{p99:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
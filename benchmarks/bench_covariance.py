@@ -0,0 +1,66 @@
+"""
+Trial covariances: per-epoch list comprehension vs batched matmul vs streaming accumulator.
+
+    python benchmarks/bench_covariance.py --channels 64 --trials 300
+"""
+# === project setup ===
+from pathlib import Path
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# === imports ===
+import argparse
+import time
+
+import numpy as np
+
+from src.utils.CSP import cov_epoch, trial_covariances, CovarianceAccumulator
+from src.utils.events import slice_epochs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--channels", type=int, default=64)
+    parser.add_argument("--trials", type=int, default=300)
+    parser.add_argument("--epoch-len", type=int, default=1200)
+    args = parser.parse_args()
+
+    gap = args.epoch_len // 2
+    n_samples = args.trials * (args.epoch_len + gap)
+    data = np.random.default_rng(0).standard_normal((n_samples, args.channels))
+    starts = np.arange(args.trials) * (args.epoch_len + gap) + gap
+    intervals = np.column_stack([starts, starts + args.epoch_len])
+    epochs = slice_epochs(data, intervals)
+
+    t0 = time.perf_counter()
+    ref = np.array([cov_epoch(ep.T) for ep in epochs]).mean(axis=0)
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batched = trial_covariances(epochs).mean(axis=0)
+    t_batch = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    views = CovarianceAccumulator(args.channels).add_epochs(slice_epochs(data, intervals, copy=False)).covariance
+    t_views = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    acc = CovarianceAccumulator(args.channels, intervals)
+    for start in range(0, n_samples, 10000):
+        acc.update(data[start:start + 10000])
+    t_stream = time.perf_counter() - t0
+
+    for name, C in [("batched", batched), ("views", views), ("streaming", acc.covariance)]:
+        assert np.allclose(C, ref), f"{name} covariance differs from the per-epoch loop"
+    print(f"{args.trials} trials x {args.epoch_len} samples x {args.channels} channels")
+    print(f"per-epoch loop:             {t_loop * 1E3:.1f} ms")
+    print(f"batched matmul:             {t_batch * 1E3:.1f} ms")
+    print(f"accumulator over views:     {t_views * 1E3:.1f} ms")
+    print(f"streaming from signal:      {t_stream * 1E3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
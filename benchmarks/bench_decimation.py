@@ -0,0 +1,89 @@
+"""
+Mu pipeline at the full rate vs after `decimate_signal` (1 kHz -> 100 Hz).
+
+Full rate: `bandpass_filter` 8-30 Hz -> epochs -> CSP covariances -> Welch PSD.
+Decimated: `decimate_signal(..., low=8, high=30)` -> `resample_intervals` ->
+the same steps on 10x fewer samples. The CSP eigenvalues of both paths
+are compared.
+
+    python benchmarks/bench_decimation.py --minutes 10 --fs-out 100
+"""
+# === project setup ===
+from pathlib import Path
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# === imports ===
+import argparse
+import time
+
+import numpy as np
+
+from src.utils.CSP import calculate_CSP_in_trials
+from src.utils.events import event_table, receive_epochs, resample_intervals, slice_epochs
+from src.utils.fb_quasi_parse_events import trigger_to_event_v1_1
+from src.utils.spectral_analysis import bandpass_filter, compute_psd_welch, decimate_signal
+from synthetic import make_trigger
+
+
+def pipeline(filt_eeg, fs, idx_motor, idx_rest):
+    timings = {}
+    t0 = time.perf_counter()
+    epochs_motor = slice_epochs(filt_eeg, idx_motor, copy=False)
+    epochs_rest = slice_epochs(filt_eeg, idx_rest, copy=False)
+    eigvals, eigvecs, A = calculate_CSP_in_trials(epochs_motor, epochs_rest)
+    timings["csp"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    compute_psd_welch(filt_eeg, fs, fmin=8, fmax=30, freq_res=0.5)
+    timings["psd"] = time.perf_counter() - t0
+    return timings, eigvals
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--channels", type=int, default=64)
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--fs", type=int, default=1000)
+    parser.add_argument("--fs-out", type=int, default=100)
+    args = parser.parse_args()
+
+    fs, fs_out = args.fs, args.fs_out
+    trigger = make_trigger(args.minutes, fs)
+    events, _ = trigger_to_event_v1_1(trigger)
+    table = event_table(events)
+    idx_motor = receive_epochs(events, event_code=1, table=table)
+    idx_rest = receive_epochs(events, event_code=2, table=table)
+
+    # независимый шум + общий mu-ритм, ослабленный во время движения
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((len(trigger), args.channels))
+    mu = bandpass_filter(rng.standard_normal(len(trigger)), fs, low=10, high=12) * 20
+    x[:, :9] += (mu * np.where(events == 1, 0.3, 1.0))[:, None]
+    bandpass_filter(x[:1000], fs)     # warm-up: SciPy import
+
+    t0 = time.perf_counter()
+    filt_full = bandpass_filter(x, fs, low=8, high=30)
+    t_filter_full = time.perf_counter() - t0
+    timings_full, eig_full = pipeline(filt_full, fs, idx_motor, idx_rest)
+
+    t0 = time.perf_counter()
+    filt_dec = decimate_signal(x, fs, fs_out, low=8, high=30)
+    t_filter_dec = time.perf_counter() - t0
+    timings_dec, eig_dec = pipeline(filt_dec, fs_out, resample_intervals(idx_motor, fs, fs_out),
+                                    resample_intervals(idx_rest, fs, fs_out))
+
+    print(f"{args.channels} channels, {args.minutes} min, {fs} Hz -> {fs_out} Hz")
+    print(f"{'stage':<10}{f'{fs} Hz [s]':>14}{f'{fs_out} Hz [s]':>14}{'speedup':>10}")
+    rows = [("filter", t_filter_full, t_filter_dec)] + [(name, timings_full[name], timings_dec[name])
+                                                      for name in timings_full]
+    for name, t_full, t_dec in rows:
+        print(f"{name:<10}{t_full:>14.3f}{t_dec:>14.3f}{t_full / t_dec:>9.1f}x")
+    print(f"CSP eigenvalues, max abs difference: {np.abs(eig_full - eig_dec).max():.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Run-length event table vs the per-sample `find_intervals` loop.
+
+    python benchmarks/bench_events.py --minutes 60
+"""
+# === project setup ===
+from pathlib import Path
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# === imports ===
+import argparse
+import time
+
+import numpy as np
+
+from src.utils.events import event_table, find_intervals, count_any_transitions, reveive_events_info
+from src.utils.fb_quasi_parse_events import trigger_to_event_v1_1
+from synthetic import make_trigger
+
+
+def find_intervals_loop(arr, value):
+    """Previous per-sample implementation of `find_intervals`."""
+    intervals, in_interval, start_idx = [], False, None
+    for i, v in enumerate(arr):
+        if v == value:
+            if not in_interval:
+                start_idx, in_interval = i, True
+        elif in_interval:
+            intervals.append([start_idx, i])
+            in_interval = False
+    if in_interval:
+        intervals.append([start_idx, len(arr)])
+    return intervals
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, default=60)
+    args = parser.parse_args()
+
+    events, _ = trigger_to_event_v1_1(make_trigger(args.minutes))
+    codes = [1, 2]
+    events_info = {"motor": {"event_code": 1, "trial_dur_ms": 1200},
+                   "rest": {"event_code": 2, "trial_dur_ms": 5000}}
+
+    t0 = time.perf_counter()
+    ref = [find_intervals_loop(events, code) for code in codes]
+    ref_counts = [int(np.sum((events[:-1] != code) & (events[1:] == code))) for code in codes]
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    table = event_table(events)
+    out = [find_intervals(events, code, table=table) for code in codes]
+    counts = [count_any_transitions(events, code, table=table) for code in codes]
+    reveive_events_info(events, events_info)
+    t_table = time.perf_counter() - t0
+
+    assert out == ref and counts == ref_counts, "event table differs from the reference loop"
+    print(f"events: {len(events)} samples, {len(table)} runs")
+    print(f"loop: {t_loop:.3f} s, event table: {t_table * 1E3:.1f} ms, speedup {t_loop / t_table:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
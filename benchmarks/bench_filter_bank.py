@@ -0,0 +1,53 @@
+"""
+Serial per-band `bandpass_filter` vs concurrent `filter_bank` (CSP band sweep).
+
+    python benchmarks/bench_filter_bank.py --channels 64 --minutes 10
+"""
+# === project setup ===
+from pathlib import Path
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# === imports ===
+import argparse
+import os
+import time
+
+import numpy as np
+
+from src.utils.spectral_analysis import bandpass_filter, filter_bank
+
+BANDS = [[8, 30], [8, 12], [9, 13], [10, 14], [11, 15]]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--channels", type=int, default=64)
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--fs", type=float, default=1000)
+    args = parser.parse_args()
+
+    x = np.random.default_rng(0).standard_normal((int(args.minutes * 60 * args.fs), args.channels))
+
+    bandpass_filter(x[:1000], fs=args.fs)     # warm-up: SciPy import
+
+    t0 = time.perf_counter()
+    for low, high in BANDS:
+        bandpass_filter(x, fs=args.fs, low=low, high=high)
+    t_serial = time.perf_counter() - t0
+    print(f"serial bandpass_filter x{len(BANDS)}: {t_serial:.2f} s")
+
+    n_cores = os.cpu_count()
+    out = np.empty((len(BANDS),) + x.shape)
+    for n_jobs in sorted({1, 2, 4, n_cores} & set(range(1, n_cores + 1))):
+        t0 = time.perf_counter()
+        filter_bank(x, fs=args.fs, bands=BANDS, out=out, n_jobs=n_jobs)
+        elapsed = time.perf_counter() - t0
+        print(f"filter_bank n_jobs={n_jobs:<3}: {elapsed:.2f} s ({t_serial / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
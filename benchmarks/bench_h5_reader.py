@@ -0,0 +1,89 @@
+"""
+Peak RSS / wall time of `load_h5df` vs lazy `H5Recording` reads.
+
+Each loader runs in a fresh subprocess, so the reported peak RSS belongs
+to that loader only.
+
+    python benchmarks/bench_h5_reader.py                      # synthetic 64 ch, 60 min
+    python benchmarks/bench_h5_reader.py --path R:/data/rec.hdf --channels 12
+"""
+# === project setup ===
+from pathlib import Path
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# === imports ===
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+from synthetic import make_recording
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / 1024**2 if sys.platform == "darwin" else rss / 1024
+    except ImportError:     # Windows
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024**2
+
+
+def run_child(mode, path, channels):
+    from src.utils.parse_h5df import load_h5df, H5Recording
+
+    t0 = time.perf_counter()
+    if mode == "load_h5df":
+        data, _ = load_h5df(path)
+        raw_eeg = data[:, channels] * 1E6
+    else:
+        with H5Recording(path) as rec:
+            raw_eeg = rec.read(channels=channels, scale=1E6)
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({"mode": mode, "time_s": elapsed, "peak_rss_mb": peak_rss_mb(),
+                      "shape": list(raw_eeg.shape)}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default=None)
+    parser.add_argument("--channels", type=int, default=12)
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    channels = np.arange(args.channels)
+    if args.child is not None:
+        run_child(args.child, args.path, channels)
+        return
+
+    tmp_dir = None
+    path = args.path
+    if path is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp_dir.name, "synthetic.hdf")
+        make_recording(path, minutes=args.minutes)
+
+    print(f"{'mode':<12}{'time [s]':>10}{'peak RSS [MB]':>16}")
+    for mode in ["load_h5df", "lazy"]:
+        out = subprocess.run([sys.executable, __file__, "--child", mode, "--path", path,
+                              "--channels", str(args.channels)],
+                             capture_output=True, text=True, check=True).stdout
+        res = json.loads(out.strip().splitlines()[-1])
+        print(f"{res['mode']:<12}{res['time_s']:>10.2f}{res['peak_rss_mb']:>16.0f}")
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Latency and throughput of the online CSP + log-variance decoder at 64 channels / 1 kHz.
+
+Chunks of `--block` samples (20 = one amplifier block) are fed to
+`CSPDecoder`; the decoder output is checked against one-shot causal
+filtering of the whole signal. With `--h5` an HDF5 recording is replayed
+instead of a synthetic signal (`--pace` replays it in real time).
+
+    python benchmarks/bench_online_csp.py --block 20
+    python benchmarks/bench_online_csp.py --h5 data/02-quasi-movements.hdf --pace
+"""
+# === project setup ===
+from pathlib import Path
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# === imports ===
+import argparse
+import time
+
+import numpy as np
+from src.utils.CSP import csp_from_covariances
+from src.utils.online_csp import CSPDecoder, replay_h5df
+from src.utils.spectral_analysis import causal_filter
+
+BAND = [8, 30]
+
+
+def random_csp(n_channels, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((4 * n_channels, n_channels))
+    Y = rng.standard_normal((4 * n_channels, n_channels))
+    return csp_from_covariances(X.T @ X, Y.T @ Y)[1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--channels", type=int, default=64)
+    parser.add_argument("--fs", type=float, default=1000)
+    parser.add_argument("--block", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--h5", type=str, default=None)
+    parser.add_argument("--pace", action="store_true")
+    args = parser.parse_args()
+
+    fs, n_ch = args.fs, args.channels
+    eigvecs = random_csp(n_ch)
+    w = np.random.default_rng(1).standard_normal(6)
+    decoder = CSPDecoder(fs, n_ch + 1 if args.h5 else n_ch, eigvecs, band=BAND,
+                         channels=np.arange(n_ch) if args.h5 else None,
+                         classifier=lambda f: float(f @ w))
+
+    if args.h5:
+        latencies = [lat for _, _, lat in replay_h5df(args.h5, decoder, chunk_size=args.block,
+                                                      scale=1E6, pace=args.pace)]
+        n_samples = decoder.n_samples
+    else:
+        x = np.random.default_rng(0).standard_normal((int(args.seconds * fs), n_ch))
+        n_samples = len(x)
+        latencies, outputs = [], []
+        for start in range(0, n_samples, args.block):
+            t0 = time.perf_counter()
+            decoded = decoder.update(x[start:start + args.block])
+            latencies.append(time.perf_counter() - t0)
+            outputs.append(decoded.features)
+
+        # проверка: то же, что причинный фильтр по всей записи
+        y = causal_filter(x @ eigvecs[:, decoder.components], fs, BAND[0], BAND[1], 4) ** 2
+        var = y[-decoder.n_window:].mean(axis=0)
+        assert np.allclose(outputs[-1], np.log(var / var.sum())), "chunked decoder differs from one-shot filtering"
+
+    lat = np.array(latencies[len(latencies) // 10:]) * 1E6     # без прогрева
+    total = np.sum(latencies)
+    print(f"{n_ch} channels @ {fs:.0f} Hz, {args.block}-sample chunks, {n_samples} samples")
+    print(f"latency mean / p99 / max:  {lat.mean():.0f} / {np.percentile(lat, 99):.0f} / {lat.max():.0f} us"
+          f"  (budget {args.block / fs * 1E6:.0f} us)")
+    print(f"throughput:                {n_samples / total / 1E3:.0f} ksamples/s"
+          f"  ({n_samples / fs / total:.0f}x real time)")
+
+
+if __name__ == "__main__":
+    main()
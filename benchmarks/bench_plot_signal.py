@@ -0,0 +1,67 @@
+"""
+Render time of `plot_signal` vs recording length: every sample vs the
+display-downsampled (min/max envelope, LTTB) plots.
+
+    python benchmarks/bench_plot_signal.py --channels 8 --minutes 1 10 60
+"""
+# === project setup ===
+from pathlib import Path
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# === imports ===
+import argparse
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+from src.visualization.plot_signal import plot_signal
+
+
+def render_time(signal, fs, method, stacked):
+    s_to_idx = lambda x: int(x * fs)
+    t0 = time.perf_counter()
+    view = plot_signal(0, len(signal) / fs, signal, s_to_idx, plot=False, method=method, stacked=stacked)
+    fig = plt.gcf()
+    fig.canvas.draw()
+    elapsed = time.perf_counter() - t0
+
+    zoom = None
+    if view is not None:       # приближение: пересчёт огибающей видимого окна
+        t0 = time.perf_counter()
+        view.ax.set_xlim(len(signal) / fs / 2, len(signal) / fs / 2 + 10)
+        fig.canvas.draw()
+        zoom = time.perf_counter() - t0
+    plt.close(fig)
+    return elapsed, zoom
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--channels", type=int, default=8)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 10, 30])
+    parser.add_argument("--fs", type=int, default=1000)
+    parser.add_argument("--stacked", action="store_true")
+    parser.add_argument("--skip-raw", action="store_true", help="do not draw every sample (slow for long records)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    methods = ([None] if not args.skip_raw else []) + ["minmax", "lttb"]
+    print(f"{args.channels} channels, {args.fs} Hz, stacked={args.stacked}")
+    print(f"{'minutes':>8}{'method':>8}{'render [s]':>12}{'zoom [s]':>10}")
+    for minutes in args.minutes:
+        signal = rng.standard_normal((int(minutes * 60 * args.fs), args.channels)).cumsum(axis=0)
+        for method in methods:
+            elapsed, zoom = render_time(signal, args.fs, method, args.stacked)
+            zoom = f"{zoom:>10.3f}" if zoom is not None else f"{'-':>10}"
+            print(f"{minutes:>8g}{str(method):>8}{elapsed:>12.3f}{zoom}")
+
+
+if __name__ == "__main__":
+    main()
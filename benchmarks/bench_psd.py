@@ -0,0 +1,73 @@
+"""
+Batched `compute_psd_welch` vs the previous per-channel `scipy.signal.welch` loop.
+
+    python benchmarks/bench_psd.py --channels 64 --minutes 5
+"""
+# === project setup ===
+from pathlib import Path
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# === imports ===
+import argparse
+import time
+
+import numpy as np
+from scipy.signal import welch
+
+from src.utils.spectral_analysis import compute_psd_welch, compute_psd_welch_intervals
+
+
+def compute_psd_welch_loop(data, fs, fmin=0.5, fmax=40.0, freq_res=0.5, nperseg=None):
+    """Previous per-channel implementation of `compute_psd_welch`."""
+    nfft = int(fs / freq_res)
+    if nperseg is None:
+        nperseg = min(256, data.shape[0])
+    psd_list = []
+    for ch in range(data.shape[1]):
+        freqs_all, psd_ch = welch(data[:, ch], fs=fs, nperseg=nperseg, nfft=nfft)
+        freq_mask = (freqs_all >= fmin) & (freqs_all <= fmax)
+        psd_list.append(psd_ch[freq_mask])
+    return freqs_all[freq_mask], np.asarray(psd_list)
+
+
+def timeit(func, *args, repeat=3, **kwargs):
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--channels", type=int, default=64)
+    parser.add_argument("--minutes", type=float, default=5)
+    parser.add_argument("--fs", type=float, default=1000)
+    args = parser.parse_args()
+
+    x = np.random.default_rng(0).standard_normal((int(args.minutes * 60 * args.fs), args.channels))
+    half = len(x) // 2
+    kwargs = dict(fmin=0.5, fmax=40, freq_res=0.5)
+
+    t_loop, (f_ref, ref) = timeit(compute_psd_welch_loop, x, args.fs, **kwargs)
+    t_batch, (f, psd) = timeit(compute_psd_welch, x, args.fs, **kwargs)
+    t_f32, (_, psd32) = timeit(compute_psd_welch, x.astype(np.float32), args.fs, **kwargs)
+    assert np.allclose(f, f_ref) and np.allclose(psd, ref), "batched PSD differs from the per-channel loop"
+    print(f"{args.channels} channels, {len(x)} samples")
+    print(f"per-channel loop:  {t_loop:.3f} s")
+    print(f"batched float64:   {t_batch:.3f} s ({t_loop / t_batch:.1f}x)")
+    print(f"batched float32:   {t_f32:.3f} s ({t_loop / t_f32:.1f}x), max rel. err {np.abs(psd32 - psd).max() / psd.max():.1e}")
+
+    t_loop2, _ = timeit(lambda: [compute_psd_welch_loop(x[:half], args.fs, **kwargs),
+                                 compute_psd_welch_loop(x[half:2 * half], args.fs, **kwargs)])
+    t_int, _ = timeit(compute_psd_welch_intervals, x, args.fs, [[0, half], [half, 2 * half]], **kwargs)
+    print(f"opened/closed halves: loop {t_loop2:.3f} s, one request {t_int:.3f} s ({t_loop2 / t_int:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
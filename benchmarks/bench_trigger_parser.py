@@ -0,0 +1,84 @@
+"""
+Vectorized trigger parsers vs the per-sample reference loops.
+
+The reference loop is timed on a short excerpt and extrapolated linearly
+(it is O(n * window_size)); on that excerpt both outputs are checked
+to be identical.
+
+    python benchmarks/bench_trigger_parser.py --minutes 60 --excerpt-s 30
+"""
+# === project setup ===
+from pathlib import Path
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# === imports ===
+import argparse
+import time
+
+import numpy as np
+
+from src.utils.fb_quasi_parse_events import (trigger_to_event_v1_1, trigger_to_event_v1_1_loop,
+                                             reparse_trigger_v1_1, reparse_trigger_v1_1_loop,
+                                             TriggerEventDecoder, intervals_to_events)
+from synthetic import make_trigger
+
+
+def timeit(func, *args, repeat=1, **kwargs):
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--excerpt-s", type=float, default=30)
+    parser.add_argument("--window-size", type=int, default=600)
+    parser.add_argument("--chunk", type=int, default=20, help="online decoder chunk size, samples")
+    args = parser.parse_args()
+
+    trigger = make_trigger(args.minutes)
+    excerpt = trigger[:int(args.excerpt_s * 1000)]
+    scale = len(trigger) / len(excerpt)
+
+    print(f"trigger: {len(trigger)} samples, reference loop extrapolated from {len(excerpt)} samples")
+    print(f"{'parser':<26}{'vectorized [s]':>16}{'loop [s]':>12}{'speedup':>10}")
+    for name, fast, slow in [("trigger_to_event_v1_1", trigger_to_event_v1_1, trigger_to_event_v1_1_loop),
+                             ("reparse_trigger_v1_1", reparse_trigger_v1_1, reparse_trigger_v1_1_loop)]:
+        t_slow, ref = timeit(slow, excerpt, args.window_size)
+        _, out = timeit(fast, excerpt, args.window_size)
+        if isinstance(ref, tuple):      # (events, trigger_sum)
+            assert np.array_equal(ref[1], out[1]), f"{name}: trigger_sum differs from the reference loop"
+            ref, out = ref[0], out[0]
+        assert np.array_equal(ref, out), f"{name}: vectorized output differs from the reference loop"
+
+        t_fast, _ = timeit(fast, trigger, args.window_size, repeat=3)
+        t_slow *= scale
+        print(f"{name:<26}{t_fast:>16.3f}{t_slow:>12.1f}{t_slow / t_fast:>9.0f}x")
+
+    # online decoder: same events as the batch parser, per-chunk cost
+    decoder = TriggerEventDecoder(window_size=args.window_size)
+    intervals, update_times = [], []
+    for start in range(0, len(trigger), args.chunk):
+        t0 = time.perf_counter()
+        intervals += decoder.update(trigger[start:start + args.chunk])
+        update_times.append(time.perf_counter() - t0)
+    intervals += decoder.flush()
+    ref, _ = trigger_to_event_v1_1(trigger, args.window_size)
+    assert np.array_equal(intervals_to_events(intervals, len(trigger)), ref), "online decoder differs from the batch parser"
+
+    update_times = np.array(update_times) * 1E6
+    print(f"TriggerEventDecoder, {args.chunk}-sample chunks: "
+          f"mean {update_times.mean():.0f} us, p99 {np.percentile(update_times, 99):.0f} us per update, "
+          f"detection latency <= {args.window_size} samples")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Benchmark suite over the hot paths of the pipeline, on a synthetic recording.
+
+Every case is timed (best of `--repeat` runs) and then run once more under
+`tracemalloc` to record its peak allocation (NumPy buffers included).
+Results go to a JSON file together with the parameters and library
+versions; `--compare` prints the speedup against an earlier run.
+
+    python benchmarks/run_benchmarks.py --minutes 10 --out results/baseline.json
+    python benchmarks/run_benchmarks.py --minutes 10 --out results/new.json --compare results/baseline.json
+    python benchmarks/run_benchmarks.py --only bandpass_filter compute_psd_welch
+
+The cases only use call signatures that exist since the baseline commit,
+so an older tree can be measured with `--root` (its ``src/`` is imported
+instead of this one's; the recording is still made by this tree):
+
+    git worktree add /tmp/baseline <baseline-commit>
+    python benchmarks/run_benchmarks.py --root /tmp/baseline --out results/baseline.json
+"""
+# === project setup ===
+from pathlib import Path
+import argparse
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+# --root: дерево, чей src/ измеряем (по умолчанию - это)
+_root_parser = argparse.ArgumentParser(add_help=False)
+_root_parser.add_argument("--root", default=None)
+SRC_ROOT = Path(_root_parser.parse_known_args()[0].root or PROJECT_ROOT).resolve()
+sys.path.insert(0, str(SRC_ROOT))
+
+# === imports ===
+import datetime
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import scipy
+
+from src.utils.CSP import calculate_CSP, calculate_CSP_in_trials, cov_epoch
+from src.utils.events import receive_epochs, slice_epochs
+from src.utils.fb_quasi_parse_events import trigger_to_event_v1_1, reparse_trigger_v1_1
+from src.utils.parse_h5df import load_h5df, ttl2binary, reverse_trigger
+from src.utils.spectral_analysis import bandpass_filter, compute_psd_welch, compute_windowed_fft
+from bench_h5_reader import peak_rss_mb
+from synthetic import rhythm_channels, MU_LABELS
+
+
+def build_cases(path, fs, n_channels):
+    """
+    (name -> zero-argument callable) for every benchmarked function.
+
+    Inputs are prepared here, outside the timed region, from the same
+    recording; each case reproduces the call of the analysis scripts with
+    the signatures of the baseline commit, so both trees can run it.
+    """
+    data, _ = load_h5df(path)
+    eeg = data[:, :n_channels] * 1E6
+    trigger = reverse_trigger(ttl2binary(data[:, -1], bit_index=0))
+    window_size = int(0.6 * fs)
+    del data
+
+    events, _ = trigger_to_event_v1_1(trigger, window_size=window_size)
+    idx_motor = receive_epochs(events, event_code=1)
+    idx_rest = receive_epochs(events, event_code=2)
+    filt_eeg = bandpass_filter(eeg, fs, low=8, high=30)
+    epochs_motor = slice_epochs(filt_eeg, idx_motor)
+    epochs_rest = slice_epochs(filt_eeg, idx_rest)
+    C_motor = np.mean([cov_epoch(ep.T) for ep in epochs_motor], axis=0)
+    C_rest = np.mean([cov_epoch(ep.T) for ep in epochs_rest], axis=0)
+    roi = rhythm_channels(eeg.shape[1], MU_LABELS)
+
+    return {
+        "load_h5df": lambda: load_h5df(path),
+        "bandpass_filter": lambda: bandpass_filter(eeg, fs, low=0.5, high=40),
+        "compute_psd_welch": lambda: compute_psd_welch(eeg, fs, fmin=1, fmax=40),
+        "compute_windowed_fft": lambda: compute_windowed_fft(eeg, fs=fs, channels=roi),
+        "trigger_to_event_v1_1": lambda: trigger_to_event_v1_1(trigger, window_size=window_size),
+        "reparse_trigger_v1_1": lambda: reparse_trigger_v1_1(trigger, window_size=window_size),
+        "slice_epochs": lambda: (slice_epochs(filt_eeg, idx_motor), slice_epochs(filt_eeg, idx_rest)),
+        "calculate_CSP": lambda: calculate_CSP(C_motor, C_rest),
+        "calculate_CSP_in_trials": lambda: calculate_CSP_in_trials(epochs_motor, epochs_rest),
+    }
+
+
+def run_case(func, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"time_s": min(times), "times_s": times, "peak_alloc_mb": peak / 1024**2}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SRC_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--channels", type=int, default=64)
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--fs", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--path", default=None, help="existing recording instead of a synthetic one")
+    parser.add_argument("--root", default=None, help="project tree whose src/ is benchmarked (e.g. a baseline worktree)")
+    parser.add_argument("--only", nargs="*", default=None, help="run only these cases")
+    parser.add_argument("--out", default=None, help="JSON file for the results")
+    parser.add_argument("--compare", default=None, help="JSON file of an earlier run")
+    args = parser.parse_args()
+
+    tmp_dir = None
+    path = args.path
+    if path is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp_dir.name, "synthetic.hdf")
+        # отдельным процессом: генератор использует src/ этого дерева, а не --root
+        subprocess.run([sys.executable, str(Path(__file__).with_name("synthetic.py")), path,
+                        "--channels", str(args.channels), "--minutes", str(args.minutes), "--fs", str(args.fs)],
+                       check=True)
+
+    cases = build_cases(path, args.fs, args.channels)
+    if args.only:
+        cases = {name: cases[name] for name in args.only}
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    print(f"{'case':<26}{'best [s]':>10}{'peak alloc [MB]':>18}{'speedup':>10}")
+    for name, func in cases.items():
+        res = run_case(func, args.repeat)
+        results[name] = res
+        speedup = f"{baseline[name]['time_s'] / res['time_s']:.2f}x" if name in baseline else ""
+        print(f"{name:<26}{res['time_s']:>10.3f}{res['peak_alloc_mb']:>18.1f}{speedup:>10}")
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "root": str(SRC_ROOT),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "recording": None if tmp_dir is not None else path,
+            "channels": args.channels,
+            "minutes": args.minutes,
+            "fs": args.fs,
+            "repeat": args.repeat,
+            "peak_rss_mb": peak_rss_mb(),
+        },
+        "results": results,
+    }
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"results -> {args.out}")
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
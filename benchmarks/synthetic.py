@@ -0,0 +1,133 @@
+"""
+Synthetic recordings in the layout of the amplifier files.
+
+`make_recording` writes ``eeg/data`` (n_samples + 1, n_channels + 1) in volts,
+with the photodiode TTL in the last column, and ``eeg/blocks``
+(created, received, samples) for blocks of `block_size` samples. The EEG
+is white noise plus:
+
+* occipital alpha (10 Hz), weak in the first half (eyes open) and strong
+  in the second (eyes closed), as in `run_spectr_analysis.py`;
+* sensorimotor mu (12 Hz) over the ROI of `receive_csp_components`,
+  suppressed during motor trials (ERD), so CSP has something to find.
+
+    python benchmarks/synthetic.py out.hdf --channels 64 --minutes 10
+"""
+# === project setup ===
+from pathlib import Path
+import sys
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# === imports ===
+import argparse
+
+import numpy as np
+
+from src.utils.montage_processing import get_channel_names
+
+CED_FILE = PROJECT_ROOT / "resources" / "mks64_standard.ced"
+ALPHA_LABELS = ["O1", "Oz", "O2", "PO3", "POz", "PO4", "PO7", "PO8"]
+MU_LABELS = ["FC5", "FC3", "FC1", "C1", "CP1", "CP3", "CP5", "C5", "C3"]
+
+
+def make_trigger(minutes=60, fs=1000, seed=0):
+    """
+    Quasi-movement protocol photomark: start (2 flashes), 4 motor (3 flashes), rest (4 flashes).
+    """
+    rng = np.random.default_rng(seed)
+    n_samples = int(minutes * 60 * fs)
+    flash = int(0.05 * fs)
+
+    def burst(n_flashes):
+        return np.tile(np.r_[np.ones(flash, int), np.zeros(flash, int)], n_flashes)
+
+    parts, total = [], 0
+    while total < n_samples:
+        cycle = [np.zeros(int(rng.integers(fs, 2 * fs)), int), burst(2)]
+        for _ in range(4):
+            cycle += [np.zeros(int(1.2 * fs), int), burst(3)]
+        cycle += [np.zeros(5 * fs, int), burst(4)]
+        parts += cycle
+        total += sum(len(p) for p in cycle)
+    return np.concatenate(parts)[:n_samples]
+
+
+def rhythm_channels(n_channels, labels):
+    """Indices of `labels` among the first `n_channels` of the 64-channel montage."""
+    names = list(get_channel_names(str(CED_FILE)))[:n_channels]
+    idx = [names.index(label) for label in labels if label in names]
+    return np.array(idx if idx else [0], dtype=int)
+
+
+def make_recording(path, n_channels=64, minutes=60, fs=1000, seed=0, alpha_uv=20.0, mu_uv=10.0,
+                   noise_uv=10.0, block_size=20, chunk_s=60):
+    """
+    Write a synthetic recording to `path`; returns the trigger (before TTL inversion).
+
+    Written in chunks of `chunk_s` seconds, so hour-long files do not need
+    to fit in memory. Rhythms are narrow-band filtered noise with the
+    filter state carried across chunks.
+    """
+    from h5py import File
+    from src.utils.fb_quasi_parse_events import trigger_to_event_v1_1
+    from src.utils.spectral_analysis import StreamingFilter
+
+    n_samples = int(minutes * 60 * fs)
+    chunk = int(chunk_s * fs)
+    rng = np.random.default_rng(seed)
+
+    trigger = make_trigger(minutes, fs, seed)
+    events, _ = trigger_to_event_v1_1(trigger, window_size=int(0.6 * fs))
+    alpha_idx = rhythm_channels(n_channels, ALPHA_LABELS)
+    mu_idx = rhythm_channels(n_channels, MU_LABELS)
+    alpha_filt = StreamingFilter(fs, 9, 11, order=2)
+    mu_filt = StreamingFilter(fs, 11, 13, order=2)
+    band_gain = np.sqrt(fs / 4)         # единичная дисперсия после узкополосного фильтра ~2 Гц
+
+    with File(path, "w") as h5f:
+        ds = h5f.create_dataset("eeg/data", shape=(n_samples + 1, n_channels + 1), dtype=np.float64)
+        for start in range(0, n_samples, chunk):
+            stop = min(start + chunk, n_samples)
+            n = stop - start
+            x = rng.standard_normal((n, n_channels)) * noise_uv
+
+            alpha_gain = np.where(np.arange(start, stop) < n_samples // 2, 0.3, 1.0)
+            alpha = alpha_filt.update(rng.standard_normal(n)) * band_gain
+            x[:, alpha_idx] += (alpha_uv * alpha_gain * alpha)[:, None]
+
+            mu_gain = np.where(events[start:stop] == 1, 0.3, 1.0)        # ERD во время движения
+            mu = mu_filt.update(rng.standard_normal(n)) * band_gain
+            x[:, mu_idx] += (mu_uv * mu_gain * mu)[:, None]
+
+            ds[start:stop, :-1] = x * 1E-6                               # V
+            ds[start:stop, -1] = 1 - trigger[start:stop]                 # фотодиод инвертирован
+        ds[n_samples] = 0
+
+        n_blocks = -(-n_samples // block_size)
+        blocks = np.zeros(n_blocks, dtype=[('created', '<u8'), ('received', '<u8'), ('samples', '<u4')])
+        blocks["samples"] = block_size
+        blocks["samples"][-1] = n_samples - (n_blocks - 1) * block_size
+        ends_ns = np.cumsum(blocks["samples"].astype(np.int64)) * int(1E9 / fs)
+        blocks["created"] = 1_700_000_000 * 10**9 + ends_ns
+        blocks["received"] = blocks["created"] + rng.integers(1, 5, n_blocks) * 10**6
+        h5f.create_dataset("eeg/blocks", data=blocks)
+
+    return trigger
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("--channels", type=int, default=64)
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--fs", type=float, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    make_recording(args.path, args.channels, args.minutes, int(args.fs), args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Spectral analysis as a memoized pipeline (load -> filter -> reref -> signal -> PSD / STFT -> plot).
+
+Only the stages downstream of a changed config section are recomputed;
+intermediate results are kept in `cache_dir` between runs.
+
+    python run_pipeline.py configs/spectr_analysis.json
+    python run_pipeline.py configs/spectr_analysis.json --targets psd stft --no-show
+    python run_pipeline.py configs/spectr_analysis.json --force filter
+"""
+import argparse
+
+import matplotlib.pyplot as plt
+
+from src.analysis.spectr_pipeline import spectr_pipeline
+from src.utils.pipeline import MemoStore, load_config
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("config")
+    parser.add_argument("--targets", nargs="*", default=["plot"])
+    parser.add_argument("--force", nargs="*", default=[], help="stages to recompute")
+    parser.add_argument("--no-show", action="store_true")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    store = MemoStore(config.get("cache_dir"))
+    spectr_pipeline.run(config, targets=args.targets, store=store, force=args.force)
+    spectr_pipeline.report()
+
+    if not args.no_show:
+        plt.show()
+
+
+if __name__ == "__main__":
+    main()
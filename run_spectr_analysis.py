@@ -2,9 +2,14 @@ import os
 import numpy as np
 import matplotlib.pyplot as plt
 
-from src.utils.parse_h5df import load_h5df
-from src.utils.spectral_analysis import bandpass_filter, compute_psd_welch, compute_windowed_fft
-from src.utils.montage_processing import find_ch_idx
+# профилирование по стадиям (opt-in): PIPELINE_PROFILE=1 или PIPELINE_PROFILE=stages.jsonl
+# должно идти до импорта функций из src
+from src.utils import profiling
+profiling.setup_from_env()
+
+from src.utils.parse_h5df import H5Recording
+from src.utils.spectral_analysis import bandpass_filter, compute_psd_welch_intervals, compute_windowed_fft
+from src.utils.montage_processing import find_ch_idx, find_ch_idxs
 from src.utils.rereferencing import rereference_eeg
 from src.visualization.plot_signal import plot_signal
 from src.visualization.spectrogram import plot_spectrogram
@@ -39,7 +44,7 @@ labels_ROA = ["PO7", "PO3", "POz", "PO4", "PO8", "O1", "Oz", "O2", "Fz", "FCz",
 CED_FILE = r"./resources/mks10.ced"
 labels_ROA = ["PO3", "POz", "PO4", "O1", "Oz", "O2", "Fz", "Cz", "P5", "P6"] # occipital lobe and frontal electrodes
 
-idxs_ROA = [find_ch_idx(ch, CED_FILE) for ch in labels_ROA]
+idxs_ROA = find_ch_idxs(labels_ROA, CED_FILE)
 
 plt.ion() 
 
@@ -48,14 +53,16 @@ REFERENT_CHANNELS = [10, 11]    # or NONE
 
 # == load dataset ==
 
-data, _ = load_h5df(os.path.join(DATA_FOLDER, RECORD))
-print("Data shape: {}".format(data.shape))
+# читаем с диска только нужные каналы, сразу в uV
+with profiling.stage("load") as st, H5Recording(os.path.join(DATA_FOLDER, RECORD), fs=Fs) as rec:
+    print("Data shape: {}".format(rec.shape))
+    raw_eeg = rec.read(channels=EEG_CHANNELS, stop=-1, scale=1E6) # uV
+    st.outputs = raw_eeg
 
 # == preprocessing == 
 
 # bandpass filter
 print("---filtering---")
-raw_eeg = data[:-1, EEG_CHANNELS] * 1E6 # uV
 filt_eeg = bandpass_filter(raw_eeg, fs=Fs, low=0.5, high=40)
 
 
@@ -85,11 +92,10 @@ print("---psd calculation---")
 # plot_spectr(freq, psd_db[idxs_ROA], labels_ROA, plot_mean=True, freq_min = 0, freq_max=30, y_min=np.min(psd_db), y_max=np.max(psd_db), to_db=True)
 
 idx_half = len(raw_eeg) // 2
-eeg_opened = signal[:idx_half, :]       # opened eyes
-eeg_closed = signal[idx_half:, :]       # closed eyes
+intervals = [[0, idx_half],             # opened eyes
+             [idx_half, len(signal)]]   # closed eyes
 
-freq, psd_opened = compute_psd_welch(eeg_opened, fs=Fs, fmin=0.5, fmax=40, freq_res=.5)
-freq, psd_closed = compute_psd_welch(eeg_closed, fs=Fs, fmin=0.5, fmax=40, freq_res=.5)
+freq, (psd_opened, psd_closed) = compute_psd_welch_intervals(signal, fs=Fs, intervals=intervals, fmin=0.5, fmax=40, freq_res=.5)
 
 max_psd = max(np.max(psd_opened), np.max(psd_closed))
 min_psd =0
@@ -97,10 +103,11 @@ fig = plot_alpha_spectr(freq, psd_opened[idxs_ROA], psd_closed[idxs_ROA], labels
                  freq_min = 0, freq_max=20, to_db=False)
 
 
-f, t, S = compute_windowed_fft(reref_eeg, fs=Fs)
+# только каналы ROI и 1-40 Hz, усреднение по каналам до сохранения
+f, t, S = compute_windowed_fft(reref_eeg, fs=Fs, channels=idxs_ROA, fmin=1, fmax=40, average=True)
 
 fig, ax = plot_spectrogram(f, t, S, 
-                           average=True, channels=idxs_ROA,
+                           average=True,
                            fmin=1, fmax=40, 
                            title=f"EEG Spectrogram\n(average of channels: {', '.join(labels_ROA)})",
                            symmetric=True)
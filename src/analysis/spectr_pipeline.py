@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from src.utils.csp_cache import file_digest
+from src.utils.montage_processing import find_ch_idx, find_ch_idxs
+from src.utils.parse_h5df import H5Recording
+from src.utils.pipeline import Pipeline
+from src.utils.rereferencing import rereference_eeg
+from src.utils.spectral_analysis import bandpass_filter, compute_psd_welch_intervals, compute_windowed_fft
+from src.visualization.check_alpha_rhythm import plot_alpha_spectr
+from src.visualization.plot_signal import plot_signal
+from src.visualization.spectrogram import plot_spectrogram
+
+# load -> filter -> reref -> signal -> psd / stft -> plot, параметры - секции конфига (configs/spectr_analysis.json)
+spectr_pipeline = Pipeline()
+
+@spectr_pipeline.stage("load", sections=["recording"], params=["data_folder", "record", "fs", "channels", "scale"],
+                       persist=False, fingerprint=lambda p: file_digest(os.path.join(p["data_folder"], p["record"])))
+def load_stage(params):
+    with H5Recording(os.path.join(params["data_folder"], params["record"]), fs=params["fs"]) as rec:
+        return rec.read(channels=params["channels"], stop=-1, scale=params.get("scale", 1E6))  # uV
+
+@spectr_pipeline.stage("roi", sections=["montage"], params=["labels_ROA", "ced_file"], persist=False)
+def roi_stage(params):
+    return find_ch_idxs(params["labels_ROA"], params["ced_file"])
+
+@spectr_pipeline.stage("filter", deps=["load"], sections=["recording", "filter"],
+                       params=["fs", "low", "high", "order"])
+def filter_stage(params, raw_eeg):
+    return bandpass_filter(raw_eeg, fs=params["fs"], low=params["low"], high=params["high"],
+                           order=params.get("order", 4))
+
+@spectr_pipeline.stage("reref", deps=["filter"], sections=["montage", "reref"],
+                       params=["ref_channels", "ref_label", "ced_file"])
+def reref_stage(params, filt_eeg):
+    ref_idx = params.get("ref_channels")
+    if ref_idx is None:
+        ref_idx = find_ch_idx(params.get("ref_label", "Fz"), params["ced_file"])
+    return rereference_eeg(filt_eeg, ref_idx)
+
+# сигнал для psd и графика: как в run_spectr_analysis.py, reref.enabled выбирает только его,
+# спектрограмма всегда строится по перереференцированному сигналу
+@spectr_pipeline.stage("signal", deps=["filter", "reref"], sections=["reref"], params=["enabled"], persist=False)
+def signal_stage(params, filt_eeg, reref_eeg):
+    return reref_eeg if params.get("enabled", True) else filt_eeg
+
+@spectr_pipeline.stage("psd", deps=["signal"], sections=["recording", "psd"],
+                       params=["fs", "split", "fmin", "fmax", "freq_res"])
+def psd_stage(params, signal):
+    # первая часть записи - открытые глаза, вторая - закрытые
+    idx_half = int(len(signal) * params.get("split", 0.5))
+    intervals = [[0, idx_half], [idx_half, len(signal)]]
+    freq, psd = compute_psd_welch_intervals(signal, fs=params["fs"], intervals=intervals, fmin=params["fmin"],
+                                            fmax=params["fmax"], freq_res=params["freq_res"])
+    return freq, psd[0], psd[1]
+
+@spectr_pipeline.stage("stft", deps=["reref", "roi"], sections=["recording", "stft"],
+                       params=["fs", "nperseg", "noverlap", "fmin", "fmax"])
+def stft_stage(params, signal, idxs_ROA):
+    return compute_windowed_fft(signal, fs=params["fs"], channels=idxs_ROA, nperseg=params.get("nperseg", 1000),
+                                noverlap=params.get("noverlap", 100), fmin=params["fmin"], fmax=params["fmax"],
+                                average=True)
+
+@spectr_pipeline.stage("plot", deps=["signal", "psd", "stft"], sections=["recording", "montage", "plot"], memo=False)
+def plot_stage(params, signal, psd, stft):
+    fs = params["fs"]
+    s_to_idx = lambda x: int(x * fs)
+    labels_ROA = params["labels_ROA"]
+    idxs_ROA = find_ch_idxs(labels_ROA, params["ced_file"])
+    out_dir = params.get("out_dir")
+    figs = {}
+
+    if params.get("signal", True):
+        plot_signal(0, signal.shape[0] // fs, signal, s_to_idx, plot=False)  # plot all channels
+        figs["signal"] = plt.gcf()
+
+    freq, psd_opened, psd_closed = psd
+    max_psd = max(np.max(psd_opened), np.max(psd_closed))
+    figs["psd"] = plot_alpha_spectr(freq, psd_opened[idxs_ROA], psd_closed[idxs_ROA], labels_ROA, plot_mean=True,
+                                    y_min=0, y_max=max_psd, freq_min=0, freq_max=params.get("psd_freq_max", 20),
+                                    to_db=False)
+
+    f, t, S = stft
+    fig, ax = plot_spectrogram(f, t, S, average=True, fmin=f[0], fmax=f[-1],
+                               title=f"EEG Spectrogram\n(average of channels: {', '.join(labels_ROA)})",
+                               symmetric=True)
+    t_half = len(signal) * params.get("split", 0.5) / fs
+    ax.axvline(t_half, color='white')
+    figs["spectrogram"] = fig
+
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+        for name, fig in figs.items():
+            if fig is not None:
+                fig.savefig(os.path.join(out_dir, f"{name}.png"), bbox_inches="tight")
+    return figs
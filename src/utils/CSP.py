@@ -1,23 +1,98 @@
 import numpy as np
 from scipy.linalg import eigh
 
-from sklearn.covariance import MinCovDet
 import scipy.linalg as la
 
 # ===================
 # == Анатолий-like ==
 # ===================
 
-def calculate_robust_cov(epochs):
+ROBUST_COV_METHODS = ("mcd", "mcd_subsample", "epoch_trimmed", "tyler", "oas", "ledoit_wolf")
+
+def calculate_robust_cov(epochs, method="mcd", max_samples=5000, decim=None, trim=0.1,
+                         seed=0, support_fraction=0.5):
     """
     epochs [n_trials, n_samples, n_channels]
+    method:
+        "mcd"           - MinCovDet on all samples (reference, slowest)
+        "mcd_subsample" - MinCovDet on every `decim`-th sample, or on `max_samples`
+                          samples drawn with a fixed `seed`
+        "epoch_trimmed" - per-epoch covariances; the `trim` fraction of epochs
+                          farthest from the median is dropped, the rest averaged
+        "tyler"         - Tyler's M-estimator (robust shape) on a fixed-seed subsample
+                          of `max_samples`, rescaled with the median Mahalanobis distance
+        "oas", "ledoit_wolf" - shrinkage estimators (not robust to outliers, cheapest)
+    Return:
+        cov: fitted estimator; the matrix is cov.covariance_ [n_channels, n_channels]
+    """
+    from sklearn.covariance import MinCovDet, EmpiricalCovariance, OAS, LedoitWolf
+
+    if method not in ROBUST_COV_METHODS:
+        raise ValueError(f"method must be one of {ROBUST_COV_METHODS}, got {method!r}.")
+
+    if method == "epoch_trimmed":
+        covs = np.array([np.cov(ep, rowvar=False) for ep in epochs])
+        median = np.median(covs, axis=0)
+        dist = np.linalg.norm((covs - median).reshape(len(covs), -1), axis=1)
+        keep = np.argsort(dist)[:max(int(round(len(covs) * (1 - trim))), 1)]
+        est = EmpiricalCovariance(store_precision=False)
+        est.location_ = np.mean([np.mean(epochs[i], axis=0) for i in keep], axis=0)
+        est.covariance_ = covs[keep].mean(axis=0)
+        return est
+
+    data = np.concatenate(list(epochs), axis=0)   # [n_samples, n_channels]
+    if method in ("mcd_subsample", "tyler"):
+        data = _subsample(data, max_samples, decim, seed)
+
+    if method in ("mcd", "mcd_subsample"):
+        random_state = None if method == "mcd" else seed
+        MCD = MinCovDet(support_fraction=support_fraction, store_precision=False, random_state=random_state)
+        return MCD.fit(data)
+    if method == "oas":
+        return OAS(store_precision=False).fit(data)
+    if method == "ledoit_wolf":
+        return LedoitWolf(store_precision=False).fit(data)
+
+    est = EmpiricalCovariance(store_precision=False)
+    est.location_ = np.median(data, axis=0)
+    est.covariance_ = tyler_cov(data - est.location_)
+    return est
+
+def _subsample(data, max_samples, decim=None, seed=0):
+    if decim is not None:
+        return data[::decim]
+    if len(data) <= max_samples:
+        return data
+    rng = np.random.default_rng(seed)
+    idx = np.sort(rng.choice(len(data), size=max_samples, replace=False))
+    return data[idx]
+
+def tyler_cov(X, n_iter=50, tol=1e-6):
+    """
+    Tyler's M-estimator of scatter, scaled to the data.
+
+    X [n_samples, n_channels], centered
     Return:
         cov [n_channels, n_channels]
     """
-    data = np.concatenate(epochs, axis=0)   # [n_samples, n_channels]
-    MCD = MinCovDet(support_fraction=0.5, store_precision=False)
-    cov = MCD.fit(data)
-    return cov
+    from scipy.stats import chi2
+
+    X = X[np.any(X != 0, axis=1)]       # нулевые строки (плоские участки) не несут направления
+    n, p = X.shape
+    S = np.eye(p)
+    for _ in range(n_iter):
+        d = np.einsum("ij,ij->i", X @ np.linalg.inv(S), X)        # x^T S^-1 x
+        d = np.maximum(d, np.finfo(float).eps)
+        S_new = (X / d[:, None]).T @ X * (p / n)
+        S_new *= p / np.trace(S_new)
+        if np.linalg.norm(S_new - S) / np.linalg.norm(S) < tol:
+            S = S_new
+            break
+        S = S_new
+
+    # масштаб: медиана расстояний Махаланобиса = медиана chi2(p)
+    d = np.einsum("ij,ij->i", X @ np.linalg.inv(S), X)
+    return S * np.median(d) / chi2.ppf(0.5, p)
 
 def calculate_CSP(c1, c2):
     """
@@ -60,15 +135,101 @@ def cov_epoch(X):
 def regularize(C, alpha=0.05):
     return (1 - alpha) * C + alpha * np.eye(C.shape[0])
 
-def calculate_CSP_in_trials(epochs_motor, epochs_rest):
-    covs_motor = np.array([cov_epoch(ep.T) for ep in epochs_motor])  # ep: (time, ch)
-    C_motor  = covs_motor.mean(axis=0)
-    C_motor  = regularize(C_motor,  alpha=0.05)
+def trial_covariances(epochs, normalize=True):
+    """
+    Covariance of every trial in one batched BLAS call.
+
+    epochs [n_trials, n_samples, n_channels]: ndarray, Epochs or list of (time, ch) views
+    normalize: divide each covariance by its trace (as cov_epoch does)
+    Return:
+        covs [n_trials, n_channels, n_channels]
+    """
+    if isinstance(epochs, np.ndarray) and epochs.ndim == 3:
+        covs = np.matmul(epochs.transpose(0, 2, 1), epochs)
+    else:   # эпохи разной длины / представления: без копирования данных эпох
+        covs = np.array([ep.T @ ep for ep in epochs])
+    if normalize:
+        covs /= np.trace(covs, axis1=1, axis2=2)[:, None, None]
+    return covs
+
+class CovarianceAccumulator:
+    """
+    Streaming class covariance: mean of (trace-normalized) trial covariances.
+
+    Trials can be added epoch by epoch (add_epoch / add_epochs) or straight
+    from the continuous signal chunk by chunk (update), given the trial
+    intervals; only the partial sums of trials that are still open are kept.
+
+    n_channels: number of channels
+    intervals:  [start, end] of the trials in the continuous signal (for update)
+    normalize:  trace-normalize each trial covariance
+    """
+
+    def __init__(self, n_channels, intervals=None, normalize=True):
+        self.normalize = normalize
+        self.sum = np.zeros((n_channels, n_channels))
+        self.n_trials = 0
+        self.n_samples = 0
+        self.intervals = None if intervals is None else np.asarray(intervals, dtype=np.int64).reshape(-1, 2)
+        self._partial = {}
+
+    @property
+    def covariance(self):
+        return self.sum / self.n_trials
+
+    def _add(self, C):
+        if self.normalize:
+            C = C / np.trace(C)
+        self.sum += C
+        self.n_trials += 1
+
+    def add_epoch(self, X):
+        """
+        X: (time, channels)
+        """
+        self._add(X.T @ X)
+        return self
+
+    def add_epochs(self, epochs):
+        """
+        epochs: [n_trials, time, channels] ndarray, Epochs or list of (time, ch) views
+
+        Trial covariances are added to the sum one at a time, without the
+        [n_trials, ch, ch] stack (x.T @ x of a view is one BLAS call anyway).
+        """
+        for X in epochs:
+            self._add(X.T @ X)
+        return self
+
+    def update(self, chunk):
+        """
+        chunk: (time, channels), the next samples of the continuous signal
+        """
+        if self.intervals is None:
+            raise ValueError("intervals are required to accumulate from the continuous signal.")
+        start, stop = self.n_samples, self.n_samples + len(chunk)
+        self.n_samples = stop
+
+        # trials overlapping [start, stop)
+        overlap = np.flatnonzero((self.intervals[:, 0] < stop) & (self.intervals[:, 1] > start))
+        for i in overlap:
+            s, e = self.intervals[i]
+            seg = chunk[max(s - start, 0):min(e, stop) - start]
+            self._partial[i] = self._partial.get(i, 0) + seg.T @ seg
+            if e <= stop:
+                self._add(self._partial.pop(i))
+        return self
+
+def csp_from_covariances(C_motor, C_rest, alpha=0.05):
+    """
+    C_motor, C_rest: class covariance matrices [n_channels, n_channels]
+    alpha:           regularization
+    Return:
+        eigvals, eigvecs, A (spatial patterns), sorted by decreasing eigenvalue
+    """
+    C_motor = regularize(C_motor, alpha=alpha)
+    C_rest = regularize(C_rest, alpha=alpha)
 
-    covs_rest = np.array([cov_epoch(ep.T) for ep in epochs_rest])  # ep: (time, ch)
-    C_rest  = covs_rest.mean(axis=0)
-    C_rest = regularize(C_rest, alpha=0.05)
-    
     C_sum = C_motor + C_rest
     eigvals, eigvecs = eigh(C_motor, C_sum)     # λ = 1 -> motor class
     
@@ -81,4 +242,10 @@ def calculate_CSP_in_trials(epochs_motor, epochs_rest):
     A = C_sum @ eigvecs
     A /= np.linalg.norm(A, axis=0, keepdims=True) # to normalize
 
-    return eigvals, eigvecs, A
\ No newline at end of file
+    return eigvals, eigvecs, A
+
+def calculate_CSP_in_trials(epochs_motor, epochs_rest, alpha=0.05):
+    n_channels = epochs_motor[0].shape[-1]
+    C_motor = CovarianceAccumulator(n_channels).add_epochs(epochs_motor).covariance     # ep: (time, ch)
+    C_rest = CovarianceAccumulator(n_channels).add_epochs(epochs_rest).covariance
+    return csp_from_covariances(C_motor, C_rest, alpha=alpha)
@@ -0,0 +1,164 @@
+from numpy import asarray, zeros, arange, exp, pi, float64, concatenate, where
+
+
+class SlidingBandPower:
+    """
+    Band power from DFT bins of a sliding window, updated per sample block.
+
+    Only the DFT bins inside the requested bands are computed
+    (one Goertzel-like dot product per bin), instead of a full spectrum.
+    The last `window_s` seconds are kept in a double ring buffer, so the
+    current window is always a contiguous view.
+
+    Parameters
+    ----------
+    fs : float
+        Sampling frequency (Hz).
+    bands : list of [low, high]
+        Frequency bands (Hz), e.g. ``[[8, 12]]`` for alpha/mu.
+    n_channels : int
+        Number of channels in the incoming blocks.
+    channels : list or ndarray, optional
+        Channels to use (e.g. an ROI from ``find_ch_idxs``). Default: all.
+    window_s : float, optional
+        Window length (s); the frequency resolution is ``1 / window_s``.
+
+    Examples
+    --------
+    >>> bp = SlidingBandPower(fs=1000, bands=[[8, 12]], n_channels=64, channels=idxs_ROA)
+    >>> for block in stream:
+    ...     alpha = bp.update(block)[0]         # (n_roi,) uV^2
+    """
+
+    def __init__(self, fs, bands, n_channels, channels=None, window_s=1.0):
+        from scipy.signal import get_window
+
+        self.fs = fs
+        self.bands = [list(band) for band in bands]
+        self.channels = channels
+        self.n_window = int(round(window_s * fs))
+        n_ch = n_channels if channels is None else len(channels)
+
+        # только бины внутри полос
+        n = self.n_window
+        freqs = arange(n // 2 + 1) * fs / n
+        band_bins = [((freqs >= low) & (freqs <= high)).nonzero()[0] for low, high in self.bands]
+        bins = concatenate(band_bins)
+        self.freqs = freqs[bins]
+
+        window = get_window("hann", n)
+        self._basis = window * exp(-2j * pi * bins[:, None] * arange(n) / n)     # (n_bins, n)
+        # односторонний спектр: x2 для всех бинов, кроме DC и Найквиста (как в scipy)
+        one_sided = where((bins == 0) | (2 * bins == n), 1.0, 2.0)
+        self._scale = (one_sided / (fs * (window ** 2).sum()) * (fs / n))[:, None]     # density * df
+        self._band_of_bin = concatenate([[i] * len(b) for i, b in enumerate(band_bins)]).astype(int)
+
+        self._buf = zeros((2 * n, n_ch))
+        self._pos = 0
+        self.n_samples = 0
+
+    def update(self, block):
+        """
+        Feed a block of samples and return the band power over the last window.
+
+        Parameters
+        ----------
+        block : ndarray, shape (n_samples, n_channels)
+
+        Returns
+        -------
+        power : ndarray, shape (n_bands, n_channels)
+            Band power of every channel in the current window.
+        """
+        block = asarray(block)
+        if self.channels is not None:
+            block = block[:, self.channels]
+        n = self.n_window
+        if len(block) >= n:
+            block = block[-n:]
+
+        # двойной кольцевой буфер: окно всегда buf[pos:pos + n]
+        idx = (self._pos + arange(len(block))) % n
+        self._buf[idx] = block
+        self._buf[idx + n] = block
+        self._pos = (self._pos + len(block)) % n
+        self.n_samples += len(block)
+
+        window = self._buf[self._pos:self._pos + n]
+        window = window - window.mean(axis=0)
+        spec = self._basis @ window                              # (n_bins, n_channels)
+        power = (spec.real ** 2 + spec.imag ** 2) * self._scale
+
+        out = zeros((len(self.bands), power.shape[1]))
+        for i in range(len(self.bands)):
+            out[i] = power[self._band_of_bin == i].sum(axis=0)
+        return out
+
+
+class RecursiveBandPower:
+    """
+    Band power from causal band-pass filters and exponential smoothing.
+
+    Each band is a causal Butterworth band-pass (:class:`StreamingFilter`,
+    state initialized from the first sample) followed by squaring and a
+    first-order exponential moving average with time constant `tau_s`. The
+    cost per block is O(block size), with no windowing or FFT.
+
+    Parameters
+    ----------
+    fs : float
+        Sampling frequency (Hz).
+    bands : list of [low, high]
+        Frequency bands (Hz).
+    n_channels : int
+        Number of channels in the incoming blocks.
+    channels : list or ndarray, optional
+        Channels to use. Default: all.
+    order : int, optional
+        Order of the band-pass filters. Default is 4.
+    tau_s : float, optional
+        Time constant of the power smoothing (s).
+    """
+
+    def __init__(self, fs, bands, n_channels, channels=None, order=4, tau_s=0.5):
+        from src.utils.spectral_analysis import StreamingFilter
+
+        self.fs = fs
+        self.bands = [list(band) for band in bands]
+        self.channels = channels
+        n_ch = n_channels if channels is None else len(channels)
+
+        self._filters = [StreamingFilter(fs, low, high, order, "band", steady_state=True) for low, high in self.bands]
+        self._alpha = 1.0 - exp(-1.0 / (tau_s * fs))
+        self._ema_zi = zeros((len(self.bands), 1, n_ch))
+        self._power = zeros((len(self.bands), n_ch))
+        self.n_samples = 0
+
+    def update(self, block):
+        """
+        Feed a block of samples and return the smoothed band power at its last sample.
+
+        Parameters
+        ----------
+        block : ndarray, shape (n_samples, n_channels)
+
+        Returns
+        -------
+        power : ndarray, shape (n_bands, n_channels)
+        """
+        from scipy.signal import lfilter
+
+        block = asarray(block, dtype=float64)
+        if self.channels is not None:
+            block = block[:, self.channels]
+        self.n_samples += len(block)
+
+        if len(block) == 0:
+            return self._power.copy()
+
+        a = self._alpha
+        for i, filt in enumerate(self._filters):
+            y = filt.update(block)
+            ema, self._ema_zi[i] = lfilter([a], [1.0, a - 1.0], y ** 2, axis=0, zi=self._ema_zi[i])
+            self._power[i] = ema[-1]
+        return self._power.copy()
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+CSP_FIELDS = ("eigvals", "eigvecs", "patterns", "C_motor", "C_rest")
+
+# версия алгоритма: при изменении фильтрации/CSP старые записи кэша не используются
+CSP_CACHE_VERSION = 2
+
+_DIGEST_MEMO = {}
+
+def file_digest(path, block_size=1 << 20):
+    """
+    SHA-256 of a file's contents.
+
+    Memoized by (path, size, mtime), so an unchanged recording is hashed
+    once per session; any change to the file changes its digest.
+    """
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    digest = _DIGEST_MEMO.get(memo_key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        _DIGEST_MEMO[memo_key] = digest
+    return digest
+
+
+class CSPCache:
+    """
+    Content-addressed on-disk cache of CSP decompositions.
+
+    An entry holds eigenvalues, unmixing filters, spatial patterns and
+    the class covariances (:data:`CSP_FIELDS`) as one ``.npz`` file. Its key
+    is a hash of the recording contents, the event parameters, the band,
+    the filter and the regularization, plus :data:`CSP_CACHE_VERSION`, so a
+    changed recording, parameter or algorithm never hits a stale entry.
+    The total size is bounded by `max_bytes`; the least recently used
+    entries are evicted first.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Directory for the cache files (created if missing).
+    max_bytes : int, optional
+        Size limit of the cache directory. Default: 512 MB.
+
+    Examples
+    --------
+    >>> cache = CSPCache("./.cache/csp")
+    >>> key = cache.key(path, {"window_size": 600}, band=[8, 30], alpha=0.05)
+    >>> result = cache.get(key)
+    >>> if result is None:
+    ...     result = cache.put(key, eigvals=..., eigvecs=..., patterns=..., C_motor=..., C_rest=...)
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024**2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, record_path, event_params, band, alpha, filter_params=None):
+        """
+        Cache key of one decomposition.
+
+        Parameters
+        ----------
+        record_path : str
+            Path to the recording (its contents are hashed, not the path).
+        event_params : dict
+            Everything that determines the epochs (parser, window size,
+            channels, scaling, ...); must be JSON-serializable.
+        band : [low, high]
+            Band-pass filter band (Hz).
+        alpha : float
+            Regularization of the class covariances.
+        filter_params : dict, optional
+            Filter type, order, dtype, ...; must be JSON-serializable.
+        """
+        params = {"version": CSP_CACHE_VERSION, "record": file_digest(record_path), "events": event_params,
+                  "band": [float(f) for f in band], "filter": filter_params, "alpha": float(alpha)}
+        blob = json.dumps(params, sort_keys=True, default=str).encode()
+        return hashlib.sha256(blob).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    def get(self, key):
+        """
+        Cached result as a dict of arrays, or None.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as npz:
+                result = {name: npz[name] for name in npz.files}
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        try:
+            os.utime(path)      # LRU: отмечаем использование
+        except FileNotFoundError:
+            pass                # уже вытеснен другим процессом
+        return result
+
+    def put(self, key, **arrays):
+        """
+        Store a result and evict old entries if the cache is over its size limit.
+
+        Returns
+        -------
+        result : dict
+            The stored arrays.
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"     # свой временный файл у каждого процесса
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)      # атомарно: без полузаписанных файлов
+        self.evict()
+        return arrays
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits `max_bytes`.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz") and not name.endswith(".tmp.npz"):
+                try:
+                    st = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:       # удалён другим процессом
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    pass
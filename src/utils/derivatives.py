@@ -0,0 +1,326 @@
+import datetime
+import json
+import os
+
+import numpy as np
+from h5py import File
+
+# версия формата: при изменении обработки старые производные считаются устаревшими
+DERIVATIVE_VERSION = 2
+
+def derivative_path(raw_path, name="preproc"):
+    """
+    Path of a derivative next to the raw record: ``<record>.<name>.h5``.
+    """
+    stem, _ = os.path.splitext(raw_path)
+    return f"{stem}.{name}.h5"
+
+def is_derivative_path(path):
+    """
+    True for files written by :func:`write_derivative` (``<record>.<name>.h5``,
+    or its ``.tmp`` while being written), so they are not taken for raw records.
+    """
+    name = os.path.basename(path)
+    if name.endswith(".tmp"):
+        name = name[:-len(".tmp")]
+    stem, ext = os.path.splitext(name)
+    return ext == ".h5" and os.path.splitext(stem)[1] != ""
+
+def _resolve_channels(channels, ced_file):
+    from src.utils.montage_processing import find_ch_idxs
+
+    if channels is None:
+        return None
+    channels = list(channels)
+    if channels and isinstance(channels[0], str):
+        if ced_file is None:
+            raise ValueError("ced_file is required to select channels by label.")
+        return [int(i) for i in find_ch_idxs(channels, ced_file)]
+    return [int(i) for i in channels]
+
+def _default_channels(channels, ttl_channel, n_channels):
+    # по умолчанию - все каналы, кроме TTL
+    if channels is not None:
+        return channels
+    ttl_idx = None if ttl_channel is None else ttl_channel % n_channels
+    return [ch for ch in range(n_channels) if ch != ttl_idx]
+
+def write_derivative(raw_path, out_path=None, channels=None, fs=1000, scale=1E6, band=(0.5, 40.0), order=4,
+                     ref_channels=None, ced_file=None, ttl_channel=-1, compression="lzf", chunk_s=4.0,
+                     channel_block=8):
+    """
+    Write band-passed, re-referenced float32 EEG of a raw record to an HDF5 derivative.
+
+    Channels are processed `channel_block` at a time straight from the raw
+    file (:class:`H5Recording`), so memory stays bounded by one block.
+    Re-referencing is done before the (zero-phase) filtering, which is the
+    same as after it since both are linear.
+
+    Layout::
+
+        eeg/data      (n_samples, n_channels) float32, uV
+        eeg/ttl       (n_samples,) uint8, raw TTL channel
+        eeg/blocks    copy of the raw ``eeg/blocks`` table
+        attrs["provenance"]   JSON: source file and digest, band, order,
+                              references, montage and channel labels
+
+    Parameters
+    ----------
+    raw_path : str
+        Raw HDF5 record.
+    out_path : str or None, optional
+        Output path. Default: :func:`derivative_path`.
+    channels : list of int or str, optional
+        EEG channels (indices, or labels with `ced_file`). Default: all but `ttl_channel`.
+    fs : float, optional
+        Sampling frequency (Hz).
+    scale : float, optional
+        Unit conversion of the raw values (1E6: V -> uV).
+    band : [low, high] or None, optional
+        Band-pass band (Hz); None: no filtering.
+    order : int, optional
+        Order of the Butterworth filter.
+    ref_channels : list of int or str, optional
+        Reference electrodes (indices into the raw channels, or labels);
+        None: no re-referencing.
+    ced_file : str, optional
+        Montage, to resolve labels and store channel names.
+    ttl_channel : int or None, optional
+        Raw channel with the TTL signal, copied as is. None: skip.
+    compression : {"lzf", "gzip", None}, optional
+        Chunked and compressed (hyperslab reads) or, with None, contiguous
+        and uncompressed, which can be opened with ``np.memmap``.
+    chunk_s : float, optional
+        Chunk length (s) of the compressed layout.
+    channel_block : int, optional
+        Channels filtered (and chunked) together.
+
+    Returns
+    -------
+    out_path : str
+    """
+    from src.utils.csp_cache import file_digest
+    from src.utils.montage_processing import get_channel_names
+    from src.utils.parse_h5df import H5Recording
+    from src.utils.spectral_analysis import filter_signal
+
+    out_path = out_path or derivative_path(raw_path)
+    channels = _resolve_channels(channels, ced_file)
+    ref_channels = _resolve_channels(ref_channels, ced_file)
+
+    with H5Recording(raw_path, fs=fs) as rec:
+        channels = _default_channels(channels, ttl_channel, rec.n_channels)
+        n_samples, n_ch = rec.n_samples, len(channels)
+
+        provenance = {
+            "version": DERIVATIVE_VERSION,
+            "source": os.path.abspath(raw_path),
+            "source_sha256": file_digest(raw_path),
+            "source_size": os.stat(raw_path).st_size,
+            "source_mtime_ns": os.stat(raw_path).st_mtime_ns,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "fs": fs,
+            "scale": scale,
+            "units": "uV" if scale == 1E6 else f"raw * {scale:g}",
+            "channels": channels,
+            "ttl_channel": ttl_channel,
+            "band": list(band) if band is not None else None,
+            "order": order,
+            "filter": "butterworth sosfiltfilt" if band is not None else None,
+            "ref_channels": ref_channels,
+            "montage": os.path.basename(ced_file) if ced_file else None,
+            "compression": compression,
+            "labels": [str(label) for label in get_channel_names(ced_file)[channels]] if ced_file else None,
+        }
+
+        ref = None
+        if ref_channels is not None:
+            ref = rec.read(channels=ref_channels, scale=scale).mean(axis=1, keepdims=True)
+
+        tmp_path = out_path + ".tmp"
+        with File(tmp_path, "w") as h5f:
+            if compression is None:
+                ds = h5f.create_dataset("eeg/data", shape=(n_samples, n_ch), dtype="<f4")
+            else:
+                chunks = (max(1, min(int(chunk_s * fs), n_samples)), min(channel_block, n_ch))
+                ds = h5f.create_dataset("eeg/data", shape=(n_samples, n_ch), dtype="<f4",
+                                        chunks=chunks, compression=compression, shuffle=True)
+
+            for start in range(0, n_ch, channel_block):
+                block_channels = channels[start:start + channel_block]
+                block = rec.read(channels=block_channels, scale=scale, dtype=np.float64)
+                if ref is not None:
+                    block -= ref
+                if band is not None:
+                    filter_signal(block, fs, low=band[0], high=band[1], order=order, out=block)
+                ds[:, start:start + len(block_channels)] = block.astype(np.float32)
+
+            if ttl_channel is not None:
+                h5f.create_dataset("eeg/ttl", data=rec.read(channels=ttl_channel).astype(np.uint8),
+                                   compression=compression)
+            h5f.create_dataset("eeg/blocks", data=rec.blocks)
+            h5f.attrs["provenance"] = json.dumps(provenance)
+        os.replace(tmp_path, out_path)      # незаконченный файл не подменит старый
+
+    return out_path
+
+
+class Derivative:
+    """
+    Preprocessed recording written by :func:`write_derivative`.
+
+    A contiguous (uncompressed) ``eeg/data`` is opened as a read-only
+    ``np.memmap``: opening is instant and pages are read on access. A
+    compressed one is read lazily by hyperslab through h5py.
+
+    Parameters
+    ----------
+    path : str
+        Derivative file.
+    mmap : bool, optional
+        Memory-map the data when the layout allows it.
+
+    Attributes
+    ----------
+    data : np.memmap or h5py.Dataset, shape (n_samples, n_channels)
+        Preprocessed EEG (float32).
+    provenance : dict
+        Processing parameters and source of the data.
+
+    Examples
+    --------
+    >>> with Derivative(derivative_path(raw_path)) as der:
+    ...     filt_eeg = der.data              # (n_samples, n_channels) float32, uV
+    ...     trigger = reverse_trigger(ttl2binary(der.ttl[:], bit_index=0))
+    """
+
+    def __init__(self, path, mmap=True):
+        self.path = path
+        self._h5f = File(path, "r")
+        self.provenance = json.loads(self._h5f.attrs["provenance"])
+        self.fs = self.provenance["fs"]
+        ds = self._h5f["eeg"]["data"]
+        self.blocks = self._h5f["eeg"]["blocks"][:]
+        self.ttl = self._h5f["eeg"]["ttl"] if "ttl" in self._h5f["eeg"] else None
+
+        offset = ds.id.get_offset() if ds.chunks is None and ds.compression is None else None
+        self.is_mmap = bool(mmap and offset is not None)
+        if self.is_mmap:
+            self.data = np.memmap(path, dtype=ds.dtype, mode="r", offset=offset, shape=ds.shape)
+        else:
+            self.data = ds
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def labels(self):
+        return self.provenance.get("labels")
+
+    def read(self, channels=None, start=None, stop=None, dtype=None):
+        """
+        Read a channel subset and a sample range into memory.
+        """
+        start, stop, _ = slice(start, stop).indices(self.shape[0])
+        if channels is None:
+            out = self.data[start:stop]
+        elif self.is_mmap:
+            out = self.data[start:stop, channels]
+        else:
+            idx = np.asarray(channels).reshape(-1)
+            order = np.argsort(idx)
+            out = self.data[start:stop, idx[order].tolist()][:, np.argsort(order)]   # h5py: индексы по возрастанию
+        out = np.asarray(out)
+        return out.astype(dtype, copy=False) if dtype is not None else out
+
+    def close(self):
+        self.data = None
+        self._h5f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def is_derivative_current(path, raw_path, **params):
+    """
+    True if `path` exists and was built from the current contents of
+    `raw_path` with the given :func:`write_derivative` parameters
+    (defaults included). The raw file is hashed only if its size or
+    modification time differ from the recorded ones.
+    """
+    import inspect
+    from src.utils.csp_cache import file_digest
+
+    if not os.path.exists(path):
+        return False
+    with File(path, "r") as h5f:
+        provenance = json.loads(h5f.attrs.get("provenance", "{}"))
+    if provenance.get("version") != DERIVATIVE_VERSION:
+        return False
+    # размер и время изменения совпали - файл не трогали, хэш не считаем
+    st = os.stat(raw_path)
+    unchanged = (provenance.get("source_size"), provenance.get("source_mtime_ns")) == (st.st_size, st.st_mtime_ns)
+    if not unchanged:
+        if provenance.get("source_sha256") != file_digest(raw_path):
+            return False
+        # содержимое то же (файл скопировали/тронули): запоминаем новые размер и время
+        provenance.update(source_size=st.st_size, source_mtime_ns=st.st_mtime_ns)
+        try:
+            with File(path, "r+") as h5f:
+                h5f.attrs["provenance"] = json.dumps(provenance)
+        except OSError:
+            pass        # только чтение - просто проверим хэш и в следующий раз
+
+    bound = inspect.signature(write_derivative).bind(raw_path, **params)
+    bound.apply_defaults()
+    args = bound.arguments
+    expected = {
+        "fs": args["fs"],
+        "scale": args["scale"],
+        "band": list(args["band"]) if args["band"] is not None else None,
+        "order": args["order"],
+        "ref_channels": _resolve_channels(args["ref_channels"], args["ced_file"]),
+        "montage": os.path.basename(args["ced_file"]) if args["ced_file"] else None,
+        "compression": args["compression"],
+        "ttl_channel": args["ttl_channel"],
+    }
+    channels = _resolve_channels(args["channels"], args["ced_file"])
+    if channels is None:
+        from src.utils.parse_h5df import H5Recording
+
+        with H5Recording(raw_path, fs=args["fs"]) as rec:
+            channels = _default_channels(None, args["ttl_channel"], rec.n_channels)
+    expected["channels"] = channels
+    return all(provenance.get(name) == value for name, value in expected.items())
+
+def open_derivative(raw_path, name="preproc", mmap=True, check=True, **params):
+    """
+    Open the derivative of `raw_path`, (re)building it if missing or stale.
+
+    Parameters
+    ----------
+    raw_path : str
+        Raw HDF5 record.
+    name : str, optional
+        Derivative name (see :func:`derivative_path`).
+    mmap : bool, optional
+        See :class:`Derivative`.
+    check : bool, optional
+        Verify the provenance against the raw file (hashes it only if its
+        size or modification time changed). False: open an existing
+        derivative as is.
+    **params
+        Passed to :func:`write_derivative`.
+
+    Returns
+    -------
+    derivative : Derivative
+    """
+    path = derivative_path(raw_path, name)
+    if not os.path.exists(path) or (check and not is_derivative_current(path, raw_path, **params)):
+        write_derivative(raw_path, out_path=path, **params)
+    return Derivative(path, mmap=mmap)
@@ -1,9 +1,138 @@
-from numpy import array, asarray, sum, diff
+from numpy import (array, asarray, sum, diff, concatenate, flatnonzero, empty, int64, column_stack,
+                   arange, zeros, full, integer, rint, repeat)
+from numpy.lib.stride_tricks import as_strided
 
-def slice_epochs(data, intervals):
+EVENT_TABLE_DTYPE = [("onset", int64), ("offset", int64), ("code", float), ("duration", int64)]
+
+class Epochs:
+    """
+    Epochs stored as views into a continuous signal, without copying.
+
+    Each epoch is ``data[start:stop]``. Epochs may have different lengths;
+    use :meth:`crop` to make them equal, :meth:`padded` to get a padded
+    array with a validity mask, or :meth:`as_array` for a 3D array.
+    Iterating yields ``(n_samples_in_epoch, n_channels)`` views, so any
+    routine that loops over epochs (e.g. ``calculate_CSP_in_trials``,
+    per-epoch ``compute_psd_welch``) consumes it directly.
+
+    Parameters
+    ----------
+    data : ndarray, shape (n_samples, n_channels)
+        Continuous signal. Not copied.
+    intervals : array-like of [start, end]
+        Start (inclusive) and end (exclusive) index of each epoch;
+        ``0 <= start <= end <= len(data)``.
+    """
+
+    def __init__(self, data, intervals):
+        self.data = asarray(data)
+        intervals = asarray(intervals, dtype=int64).reshape(-1, 2)
+        self.starts = intervals[:, 0]
+        self.stops = intervals[:, 1]
+        bad = (self.starts < 0) | (self.starts > self.stops) | (self.stops > len(self.data))
+        if bad.any():
+            start, stop = intervals[bad][0]
+            raise ValueError(f"epoch [{start}, {stop}) is out of bounds of data with {len(self.data)} samples.")
+
+    @property
+    def lengths(self):
+        return self.stops - self.starts
+
+    @property
+    def intervals(self):
+        return column_stack([self.starts, self.stops])
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, integer)):
+            return self.data[self.starts[key]:self.stops[key]]
+        return Epochs(self.data, self.intervals[key])
+
+    def __iter__(self):
+        for start, stop in zip(self.starts, self.stops):
+            yield self.data[start:stop]
+
+    def crop(self, length=None, align="end"):
+        """
+        Epochs of equal length (default: the shortest one), still views.
+
+        Parameters
+        ----------
+        length : int or None, optional
+            Epoch length in samples. Default: minimal epoch duration.
+        align : {"end", "start"}, optional
+            Keep the last (as :func:`slice_epochs` does) or the first
+            `length` samples of every epoch.
+        """
+        if length is None:
+            length = int(self.lengths.min())
+        if align == "end":
+            return Epochs(self.data, column_stack([self.stops - length, self.stops]))
+        if align == "start":
+            return Epochs(self.data, column_stack([self.starts, self.starts + length]))
+        raise ValueError(f"align must be 'end' or 'start', got {align!r}.")
+
+    def as_array(self):
+        """
+        Epochs as an ndarray of shape (n_epochs, n_samples_in_epoch, n_channels).
+
+        All epochs must have the same length (see :meth:`crop`). If the
+        epochs are evenly spaced in the signal, the result is a read-only
+        strided view of `data`; otherwise it is a copy.
+        """
+        lengths = self.lengths
+        if len(self) == 0:
+            return empty((0, 0) + self.data.shape[1:], dtype=self.data.dtype)
+        if (lengths != lengths[0]).any():
+            raise ValueError("epochs have different lengths; use crop() or padded().")
+
+        length = int(lengths[0])
+        steps = diff(self.starts)
+        evenly_spaced = len(steps) == 0 or (steps[0] >= 0 and (steps == steps[0]).all())
+        # as_strided не проверяет границы: последняя эпоха должна целиком лежать в data
+        if evenly_spaced and self.starts[-1] + length <= len(self.data):
+            step = int(steps[0]) if len(steps) else 0
+            base = self.data[self.starts[0]:]
+            strides = (step * self.data.strides[0],) + self.data.strides
+            return as_strided(base, shape=(len(self), length) + self.data.shape[1:], strides=strides, writeable=False)
+
+        return self.data[self.starts[:, None] + arange(length)]
+
+    def padded(self, fill_value=0.0, align="start"):
+        """
+        Variable-length epochs as a padded array plus a mask of valid samples.
+
+        Parameters
+        ----------
+        fill_value : float, optional
+            Value for padded samples.
+        align : {"start", "end"}, optional
+            Put the data at the beginning (pad at the end) or at the end.
+
+        Returns
+        -------
+        epochs : ndarray, shape (n_epochs, max_len, n_channels)
+        mask : ndarray of bool, shape (n_epochs, max_len)
+            True where `epochs` holds real samples.
+        """
+        max_len = int(self.lengths.max()) if len(self) else 0
+        out = full((len(self), max_len) + self.data.shape[1:], fill_value, dtype=self.data.dtype)
+        mask = zeros((len(self), max_len), dtype=bool)
+        for i, epoch in enumerate(self):
+            sl = slice(0, len(epoch)) if align == "start" else slice(max_len - len(epoch), max_len)
+            out[i, sl] = epoch
+            mask[i, sl] = True
+        return out, mask
+
+
+def slice_epochs(data, intervals, copy=True):
     """
     Slice multi-channel data into epochs based on start and end indices.
 
+    Epochs are truncated to the minimal duration, keeping their last samples.
+
     Parameters
     ----------
     data : array-like, shape (n_samples, n_channels)
@@ -11,36 +140,130 @@ def slice_epochs(data, intervals):
     intervals : list of [start, end]
         List of intervals specifying the start (inclusive) and end (exclusive)
         indices for each epoch.
+    copy : bool, optional
+        If True (default), return a new ndarray. If False, return
+        :class:`Epochs` made of views into `data` (no copy).
 
     Returns
     -------
-    epochs : ndarray, shape (n_epochs, n_samples_in_epoch, n_channels)
+    epochs : ndarray or Epochs, shape (n_epochs, n_samples_in_epoch, n_channels)
         Array containing the extracted epochs.
     """
+    epochs = Epochs(data, intervals).crop(align="end")
+    if not copy:
+        return epochs
+    return array(list(epochs))
+
+def event_table(events):
+    """
+    Run-length encode a discrete event signal in one vectorized pass.
+
+    Parameters
+    ----------
+    events : array-like, shape (n_samples,)
+        Event codes per sample (e.g. 0 - no event, 1 - motor, 2 - rest).
+
+    Returns
+    -------
+    table : structured ndarray, dtype EVENT_TABLE_DTYPE
+        One row per run of equal values, for every code at once:
+        ``onset`` (inclusive), ``offset`` (exclusive), ``code`` and
+        ``duration`` (in samples).
+    """
+    events = asarray(events).ravel()
+    n = len(events)
+    if n == 0:
+        return empty(0, dtype=EVENT_TABLE_DTYPE)
 
-    min_epoch_dur = min(diff(intervals))[0]
+    change = flatnonzero(events[1:] != events[:-1]) + 1
+    table = empty(len(change) + 1, dtype=EVENT_TABLE_DTYPE)
+    table["onset"] = concatenate([[0], change])
+    table["offset"] = concatenate([change, [n]])
+    table["code"] = events[table["onset"]]
+    table["duration"] = table["offset"] - table["onset"]
+    return table
 
-    epochs = []
-    for start, end in intervals:
-        epochs.append(data[end-min_epoch_dur:end])
-    # print(array(epochs))
-    return array(epochs)
+def table_intervals(table, event_code):
+    """
+    Intervals of `event_code` from an :func:`event_table`.
 
-def receive_epochs(events, event_code):
-    return asarray(find_intervals(events, event_code))
+    Returns
+    -------
+    intervals : ndarray, shape (n_intervals, 2)
+        ``[start, end]`` rows (inclusive start, exclusive end).
+    """
+    rows = table[table["code"] == event_code]
+    return column_stack([rows["onset"], rows["offset"]])
+
+def resample_intervals(intervals, fs, fs_out):
+    """
+    Convert ``[start, end)`` sample intervals to the sampling rate `fs_out`.
+
+    Boundaries are rounded to the nearest output sample, so epoch lengths
+    may differ by one sample (see :meth:`Epochs.crop`).
+    """
+    intervals = asarray(intervals, dtype=float)
+    return rint(intervals * (fs_out / fs)).astype(int64)
+
+def resample_table(table, fs, fs_out, n_out=None):
+    """
+    :func:`event_table` converted to the sampling rate `fs_out`.
+
+    Runs shorter than one output sample disappear.
+    """
+    table = table.copy()
+    table["onset"] = resample_intervals(table["onset"], fs, fs_out)
+    table["offset"] = resample_intervals(table["offset"], fs, fs_out)
+    if n_out is not None and len(table):
+        table["offset"][-1] = n_out
+    table["duration"] = table["offset"] - table["onset"]
+    return table[table["duration"] > 0]
+
+def resample_events(events, fs, fs_out, n_out=None):
+    """
+    Per-sample event codes at the sampling rate `fs_out`.
+
+    Parameters
+    ----------
+    events : array-like, shape (n_samples,)
+        Event codes at `fs`.
+    fs, fs_out : float
+        Input and output sampling frequencies (Hz).
+    n_out : int, optional
+        Output length, e.g. ``len(decimate_signal(...))``. Default:
+        ``round(n_samples * fs_out / fs)``.
+
+    Returns
+    -------
+    events_out : ndarray, shape (n_out,)
+    """
+    events = asarray(events)
+    if n_out is None:
+        n_out = int(rint(len(events) * fs_out / fs))
+    table = resample_table(event_table(events), fs, fs_out, n_out)
+    return repeat(table["code"].astype(events.dtype), table["duration"])
+
+def receive_epochs(events, event_code, table=None):
+    """
+    Epoch intervals for `event_code`; pass a precomputed `table` to reuse one RLE pass.
+    """
+    if table is None:
+        table = event_table(events)
+    return table_intervals(table, event_code)
 
 def reveive_events_info(events, events_info=None):
     if events_info is None:
         assert "events_info is empty."
 
+    table = event_table(events)
     for key in events_info:
-        events_info[key]["num"] = count_any_transitions(events, events_info[key]["event_code"])
+        events_info[key]["num"] = count_any_transitions(events, events_info[key]["event_code"], table=table)
         events_info[key]["dur"] = get_duration(events_info[key]["trial_dur_ms"], events_info[key]["num"])
 
 def get_duration(trial_dur, n_trial, degree=1):
     return float(round(trial_dur * n_trial / 1000 * degree, 1))
 
-def count_any_transitions(arr, event_code=1):
+def count_any_transitions(arr, event_code=1, table=None):
     """
     Count transitions to bit in a discrete signal.
 
@@ -50,20 +273,21 @@ def count_any_transitions(arr, event_code=1):
         Input array of numbers.
     event_code: int
         Code of some event.
+    table : structured ndarray, optional
+        Precomputed :func:`event_table` of `arr`.
 
     Returns
     -------
     transitions : int
         Number of transitions.
     """
-    arr = asarray(arr)
-    # сдвинутый массив на 1 для сравнения текущего и предыдущего значения
-    prev = arr[:-1]
-    curr = arr[1:]
-    return int(sum((prev != event_code) & (curr == event_code)))
+    if table is None:
+        table = event_table(arr)
+    # каждый run кода, кроме начинающегося с первого отсчёта, - это переход
+    return int(sum((table["code"] == event_code) & (table["onset"] > 0)))
     
 
-def find_intervals(arr, value):
+def find_intervals(arr, value, table=None):
     """
     Find intervals where a specific value occurs consecutively in an array.
 
@@ -72,6 +296,8 @@ def find_intervals(arr, value):
     arr : array-like
     value : int
         Value to search for.
+    table : structured ndarray, optional
+        Precomputed :func:`event_table` of `arr`.
 
     Returns
     -------
@@ -79,23 +305,6 @@ def find_intervals(arr, value):
         List of intervals where the value occurs consecutively.
         Each interval is [start_index, end_index] (inclusive start, exclusive end).
     """
-    arr = asarray(arr)
-    intervals = []
-    in_interval = False
-    start_idx = None
-
-    for i, v in enumerate(arr):
-        if v == value:
-            if not in_interval:
-                start_idx = i
-                in_interval = True
-        else:
-            if in_interval:
-                intervals.append([start_idx, i])
-                in_interval = False
-
-    # если массив заканчивается значением value, закрываем последний интервал
-    if in_interval:
-        intervals.append([start_idx, len(arr)])
-
-    return intervals
+    if table is None:
+        table = event_table(arr)
+    return table_intervals(table, value).tolist()
@@ -1,4 +1,146 @@
-from numpy import zeros, asarray
+from numpy import zeros, asarray, concatenate, cumsum, full, flatnonzero, minimum, maximum, arange, int64
+
+def window_sums(trigger, window_size=600):
+    """
+    Sliding sums of the trigger, as computed by the v1_1 parsers.
+
+    ``trigger_sum[i] = sum(trigger[i:i + L])`` where ``L = window_size``
+    (or ``len(trigger) - window_size`` for short signals); windows are
+    truncated at the end of the signal.
+
+    Parameters
+    ----------
+    trigger : array-like
+        Binary (0 or 1) signal from a photodiode.
+    window_size : int, optional, default=600
+        Number of samples in the sliding window.
+
+    Returns
+    -------
+    trigger_sum : ndarray
+        Array of the same length as `trigger`.
+    """
+    trigger = asarray(trigger)
+    n = len(trigger)
+    length = max(min(window_size, n - window_size), 0)
+    acc_dtype = int64 if trigger.dtype.kind in "biu" else None
+    csum = concatenate([[0], cumsum(trigger, dtype=acc_dtype)])
+    idx = arange(n)
+    return csum[minimum(idx + length, n)] - csum[idx]
+
+def running_max(x, window_size):
+    """
+    Maximum of the last `window_size` values: ``out[i] = max(x[i - window_size + 1:i + 1])``.
+
+    Van Herk / Gil-Werman scheme: O(n) regardless of the window size.
+    """
+    x = asarray(x)
+    n = len(x)
+    w = max(int(window_size), 1)
+    if n == 0 or w == 1:
+        return x.copy()
+
+    n_blocks = -(-(n + w - 1) // w)
+    y = full(n_blocks * w, x.min(), dtype=x.dtype)
+    y[w - 1:w - 1 + n] = x                                 # спереди w-1 нейтральных значений
+    blocks = y.reshape(n_blocks, w)
+    prefix = maximum.accumulate(blocks, axis=1).ravel()
+    suffix = maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    return maximum(suffix[:n], prefix[w - 1:w - 1 + n])
+
+def find_burst_peaks(trigger, window_size=600):
+    """
+    Find the ends of photodiode bursts, i.e. the samples where the parsers' state machine steps.
+
+    Sample ``i`` is a peak if the window sum drops there and the previous
+    value is the maximum over the last `window_size` sums.
+
+    Parameters
+    ----------
+    trigger : array-like
+        Binary (0 or 1) signal from a photodiode.
+    window_size : int, optional, default=600
+        Number of samples in the sliding window.
+
+    Returns
+    -------
+    peaks : ndarray of int
+        Sample indices of the detected peaks.
+    trigger_sum : ndarray
+        See :func:`window_sums`.
+    """
+    tsum = window_sums(trigger, window_size)
+    tsummax = running_max(tsum, window_size)
+    prev = concatenate([[0], tsum[:-1]]).astype(tsum.dtype, copy=False)
+    peaks = flatnonzero((prev == tsummax) & (tsum < prev))
+    return peaks, tsum
+
+def init_state_v1_1():
+    """Initial state of the v1_1 protocol state machine."""
+    return {"wait_start": True, "n_motor": 0, "idx_trial_start": None, "idx_rest": None}
+
+def step_v1_1(peaks, state):
+    """
+    Advance the v1_1 state machine over burst peaks (as in :func:`trigger_to_event_v1_1`).
+
+    Parameters
+    ----------
+    peaks : iterable of int
+        Sample indices of burst peaks, in increasing order.
+    state : dict
+        State from :func:`init_state_v1_1`; updated in place.
+
+    Yields
+    ------
+    interval : tuple (start, stop, code)
+        Closed event interval: 1 - motor, 2 - rest.
+    """
+    for idx in peaks:
+        idx = int(idx)
+        if state["wait_start"]:                 # two  bursts  -> signal of a beginning
+            state["wait_start"] = False
+            state["idx_trial_start"] = idx
+        elif state["n_motor"] < 4:              # three bursts -> signal of a motor trial
+            state["n_motor"] += 1
+            if state["n_motor"] == 4:
+                yield state["idx_trial_start"], idx, 1
+                state["idx_rest"] = idx
+        else:                                   # four bursts -> signal of a rest trial
+            yield state["idx_rest"], idx, 2
+            state["n_motor"] = 0
+            state["wait_start"] = True
+
+def step_reparse_v1_1(peaks, state, config_info):
+    """
+    Advance the state machine of :func:`reparse_trigger_v1_1` over burst peaks.
+
+    Same as :func:`step_v1_1`, but every motor/rest burst closes a
+    fixed-duration interval ending at the burst (``config_info``).
+    Note that ``start`` may be negative near the beginning of the record,
+    exactly as in the batch parser.
+    """
+    motor_trial_dur = config_info["motor_trial_dur"]
+    rest_trial_dur = config_info["rest_trial_dur"]
+    for idx in peaks:
+        idx = int(idx)
+        if state["wait_start"]:                 # signal of a start
+            state["wait_start"] = False
+        elif state["n_motor"] < 4:              # signal of a motor trial
+            yield idx - motor_trial_dur, idx, 1
+            state["n_motor"] += 1
+        else:                                   # signal of a rest trial
+            yield idx - rest_trial_dur, idx, 2
+            state["n_motor"] = 0
+            state["wait_start"] = True
+
+def intervals_to_events(intervals, n_samples):
+    """
+    Render (start, stop, code) intervals into a dense events array, as the batch parsers do.
+    """
+    events = zeros(n_samples)
+    for start, stop, code in intervals:
+        events[start:stop] = code
+    return events
 
 def trigger_to_event_v1_1(trigger, window_size=600):
     """
@@ -9,6 +151,203 @@ def trigger_to_event_v1_1(trigger, window_size=600):
     It returns an array of the same length as the input trigger, where
     each element indicates the type of event at that time.
 
+    Burst peaks are found in bulk (:func:`find_burst_peaks`), and the
+    motor/rest state machine runs only over those peaks.
+
+    Parameters
+    ----------
+    trigger : array-like
+        Binary (0 or 1) signal from a photodiode, representing stimulus fluctuations.
+    window_size : int, optional, default=600
+        Number of samples to consider in the sliding window when detecting changes.
+
+    Returns
+    -------
+    events : array-like
+        Array of the same length as `trigger`, containing:
+        - 0 : no event
+        - 1 : motor event
+        - 2 : rest event
+    trigger_sum : array-like
+        Array of the same length as `trigger`, 
+        containing sum of its elements in window_size. 
+    """
+    peaks, trigger_sum = find_burst_peaks(trigger, window_size)
+    events = zeros(len(trigger))
+    for start, stop, code in step_v1_1(peaks, init_state_v1_1()):
+        events[start:stop] = code
+
+    return events, trigger_sum
+
+def reparse_trigger_v1_1(trigger, window_size=600, config_info = {"motor_trial_dur": 1200,"rest_trial_dur": 5000}):
+    """
+    Parse a photodiode trigger signal to detect motor and rest events.
+
+    This function scans a binary photomark signal and identifies events
+    based on the magnitude of fluctuations within a sliding window. 
+    It returns an array of the same length as the input trigger, where
+    each element indicates the type of event at that time.
+
+    Burst peaks are found in bulk (:func:`find_burst_peaks`), and the
+    motor/rest state machine runs only over those peaks.
+
+    Parameters
+    ----------
+    trigger : array-like
+        Binary (0 or 1) signal from a photodiode, representing stimulus fluctuations.
+    window_size : int, optional, default=600
+        Number of samples to consider in the sliding window when detecting changes.
+    config_info: dict, optional, defalt={"motor_trial_dur": 1200,"rest_trial_dur": 5000}
+        motor_trial_dur : int, optional, default=1200
+            Duration of a motor trial in milliseconds. Used to mark motor events.
+        rest_trial_dur : int, optional, default=5000
+            Duration of a rest trial in milliseconds. Used to mark rest events.
+
+    Returns
+    -------
+    events : array-like
+        Array of the same length as `trigger`, containing:
+        - 0 : no event
+        - 1 : motor event
+        - 2 : rest event
+    """
+    peaks, _ = find_burst_peaks(trigger, window_size)
+    events = zeros(len(trigger))
+    for start, stop, code in step_reparse_v1_1(peaks, init_state_v1_1(), config_info):
+        events[start:stop] = code
+
+    return events
+
+
+class TriggerEventDecoder:
+    """
+    Incremental (online) version of the v1_1 trigger parsers.
+
+    Consumes the photodiode trigger chunk by chunk, keeping the tail of the
+    trigger and of the window sums, the previous sum and the protocol
+    state (``wait_start``, ``n_motor``, ...) between calls. Each call
+    returns the event intervals closed by the new data.
+
+    A burst peak at sample ``i`` is detected as soon as sample
+    ``i + window_size - 1`` arrives, so the latency is bounded by
+    `window_size` samples. After :meth:`flush`, the emitted intervals
+    rendered with :func:`intervals_to_events` equal the output of
+    :func:`trigger_to_event_v1_1` (or :func:`reparse_trigger_v1_1` if
+    `config_info` is given) on the concatenated trigger, provided the
+    session is longer than ``2 * window_size`` samples.
+
+    Parameters
+    ----------
+    window_size : int, optional, default=600
+        Number of samples in the sliding window.
+    config_info : dict or None, optional
+        None - intervals as in :func:`trigger_to_event_v1_1` (the whole
+        motor block, then the rest block); otherwise fixed-duration
+        intervals as in :func:`reparse_trigger_v1_1`
+        (``{"motor_trial_dur": 1200, "rest_trial_dur": 5000}``).
+
+    Examples
+    --------
+    >>> decoder = TriggerEventDecoder(window_size=600)
+    >>> for chunk in stream:
+    ...     for start, stop, code in decoder.update(chunk):
+    ...         epoch = eeg_buffer[start:stop]          # 1 - motor, 2 - rest
+    >>> decoder.flush()
+    """
+
+    def __init__(self, window_size=600, config_info=None):
+        self.window_size = window_size
+        self.config_info = config_info
+        self.state = init_state_v1_1()
+        self.n_samples = 0          # отсчётов триггера получено
+        self.n_sums = 0             # оконных сумм посчитано
+        self._tail = zeros(0, dtype=int64)
+        self._sum_tail = zeros(0, dtype=int64)
+        self._prev = 0
+        self._closed = False
+
+    def update(self, trigger):
+        """
+        Feed the next chunk of the trigger.
+
+        Parameters
+        ----------
+        trigger : array-like
+            Next samples of the binary photodiode signal.
+
+        Returns
+        -------
+        intervals : list of tuple (start, stop, code)
+            Event intervals (absolute sample indices) closed by this chunk.
+        """
+        if self._closed:
+            raise RuntimeError("decoder is flushed; create a new one.")
+        trigger = asarray(trigger)
+        self.n_samples += len(trigger)
+
+        w = self.window_size
+        x = concatenate([self._tail, trigger])
+        if len(x) < w:
+            self._tail = x
+            return []
+
+        csum = concatenate([[0], cumsum(x, dtype=int64 if x.dtype.kind in "biu" else None)])
+        sums = csum[w:] - csum[:-w]
+        self._tail = x[len(x) - w + 1:]
+        return self._process(sums)
+
+    def flush(self):
+        """
+        Close the stream: compute the truncated window sums of the last
+        samples (as the batch parser does at the end of the record).
+
+        Returns
+        -------
+        intervals : list of tuple (start, stop, code)
+        """
+        if self._closed:
+            return []
+        self._closed = True
+        if len(self._tail) == 0:
+            return []
+        sums = cumsum(self._tail[::-1])[::-1]      # sum(tail[i:]) для каждого i
+        return self._process(sums)
+
+    def _process(self, sums):
+        w = self.window_size
+        n_hist = len(self._sum_tail)
+        hist = concatenate([self._sum_tail, sums])
+        tsummax = running_max(hist, w)[n_hist:]
+        prev = concatenate([[self._prev], sums[:-1]]).astype(hist.dtype, copy=False)
+        peaks = flatnonzero((prev == tsummax) & (sums < prev)) + self.n_sums
+
+        self.n_sums += len(sums)
+        self._prev = sums[-1]
+        self._sum_tail = hist[max(len(hist) - w + 1, 0):]
+
+        if self.config_info is None:
+            return list(step_v1_1(peaks, self.state))
+        return list(step_reparse_v1_1(peaks, self.state, self.config_info))
+
+
+# ==================================
+# == per-sample reference parsers ==
+# ==================================
+
+
+def trigger_to_event_v1_1_loop(trigger, window_size=600):
+    """
+    Per-sample reference implementation of :func:`trigger_to_event_v1_1`.
+
+    Kept to validate the vectorized parser; O(n * window_size).
+
+    Parse a photodiode trigger signal to detect motor and rest events.
+
+    This function scans a binary photomark signal and identifies events
+    based on the magnitude of fluctuations within a sliding window. 
+    It returns an array of the same length as the input trigger, where
+    each element indicates the type of event at that time.
+
     Parameters
     ----------
     trigger : array-like
@@ -62,8 +401,12 @@ def trigger_to_event_v1_1(trigger, window_size=600):
     return events, asarray(trigger_sum) 
 
 
-def reparse_trigger_v1_1(trigger, window_size=600, config_info = {"motor_trial_dur": 1200,"rest_trial_dur": 5000}):
+def reparse_trigger_v1_1_loop(trigger, window_size=600, config_info = {"motor_trial_dur": 1200,"rest_trial_dur": 5000}):
     """
+    Per-sample reference implementation of :func:`reparse_trigger_v1_1`.
+
+    Kept to validate the vectorized parser; O(n * window_size).
+
     Parse a photodiode trigger signal to detect motor and rest events.
 
     This function scans a binary photomark signal and identifies events
@@ -1,26 +1,124 @@
-import pandas as pd
+import os
+import warnings
+
 import numpy as np
 
+
+def _parse_column(values):
+    # как pandas.read_csv: числовой столбец (пустые ячейки -> NaN), иначе строки (type и т.п.)
+    try:
+        return np.array([float(v) if v.strip() else np.nan for v in values], dtype=float)
+    except ValueError:
+        return np.array(values, dtype=object)
+
+
+class Montage:
+    """
+    Electrode montage parsed once from a tab-separated ``.ced`` file.
+
+    Columns are stored as NumPy arrays (``numbers``, ``labels``, ``theta``,
+    ``radius``, ...), and labels are resolved through a label -> index dict,
+    so lookups do not touch the file or pandas.
+
+    Use :func:`load_montage` to get a cached instance.
+
+    Parameters
+    ----------
+    fl_montage : str
+        Path to the ``.ced`` file (e.g. ``resources/mks64_standard.ced``).
+    """
+
+    def __init__(self, fl_montage):
+        self.path = fl_montage
+        with open(fl_montage, "r", encoding="utf-8") as f:
+            rows = [line.rstrip("\r\n").split("\t") for line in f if line.strip()]
+
+        header, rows = rows[0], rows[1:]
+        rows = [row + [""] * (len(header) - len(row)) for row in rows]     # короткие строки - пустые ячейки
+        columns = dict(zip(header, zip(*rows)))
+        self.columns = {}
+        for name, values in columns.items():
+            self.columns[name] = np.array(values, dtype=object) if name == "labels" else _parse_column(values)
+
+        self.labels = self.columns["labels"]
+        self.numbers = self.columns["Number"].astype(int)
+        self.theta = self.columns["theta"]
+        self.radius = self.columns["radius"]
+
+        # label -> индекс канала (Number - 1); при повторах берём первый
+        self._label_to_idx = {}
+        self._n_found = {}
+        for label, number in zip(self.labels, self.numbers):
+            self._label_to_idx.setdefault(label, int(number - 1))
+            self._n_found[label] = self._n_found.get(label, 0) + 1
+
+    def __len__(self):
+        return len(self.labels)
+
+    def index(self, channel):
+        """
+        0-based index of a channel label (``Number - 1``).
+        """
+        n_found = self._n_found.get(channel, 0)
+        if n_found == 0:
+            raise KeyError(f"channel {channel!r} not found in {self.path}.")
+        if n_found > 1:
+            warnings.warn(f"Найдено несколько значений ({n_found}). Верну первое.", UserWarning)
+        return self._label_to_idx[channel]
+
+    def indices(self, channels):
+        """
+        0-based indices of several channel labels at once.
+
+        Returns
+        -------
+        idxs : ndarray of int
+        """
+        return np.array([self.index(ch) for ch in channels], dtype=int)
+
+    def topo_positions(self):
+        """
+        2D (x, y) positions for topographic maps, shape (n_channels, 2).
+        """
+        th = np.pi / 180 * self.theta
+        y = np.round(self.radius * np.cos(th), 2)
+        x = np.round(self.radius * np.sin(th), 2)
+        return np.column_stack([x, y])
+
+    def good_channels(self, radius=0.54):
+        """
+        Labels of the channels within `radius`.
+        """
+        return self.labels[self.radius <= radius]
+
+
+_MONTAGE_CACHE = {}
+
+def load_montage(fl_montage):
+    """
+    Parsed :class:`Montage` for a ``.ced`` file, cached per path.
+
+    The file is re-parsed only if its modification time changed.
+    """
+    key = os.path.abspath(fl_montage)
+    mtime = os.stat(key).st_mtime_ns
+    cached = _MONTAGE_CACHE.get(key)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, Montage(fl_montage))
+        _MONTAGE_CACHE[key] = cached
+    return cached[1]
+
 def find_ch_idx(channel, fl_montage):
-    import warnings
-    df = pd.read_csv(fl_montage, sep='\t')
-    idx = df.loc[df['labels'] == channel, 'Number'].values
-    if len(idx) > 1:
-        warnings.warn(f"Найдено несколько значений ({len(idx)}). Верну первое.", UserWarning)
-    return int(idx[0] - 1)
+    return load_montage(fl_montage).index(channel)
+
+def find_ch_idxs(channels, fl_montage):
+    return load_montage(fl_montage).indices(channels)
 
 def get_channel_names(fl_montage):
-    import warnings
-    df = pd.read_csv(fl_montage, sep='\t')
-    return df["labels"].values
+    return load_montage(fl_montage).labels.copy()
 
 def get_topo_positions(fl_montage):
-    df = pd.read_csv(fl_montage, sep='\t')
-    th = np.pi / 180 * np.array(df.theta.values)
-    df['y'] = np.round(np.array(df.radius.values) * np.cos(th), 2)
-    df['x'] = np.round(np.array(df.radius.values) * np.sin(th), 2)
-    return df[['x', 'y']].values
+    return load_montage(fl_montage).topo_positions()
 
 def get_good_channels(fl_montage, radius=0.54):
-    df = pd.read_csv(fl_montage, sep='\t')
-    return df.loc[df.radius <= radius]["labels"].values
\ No newline at end of file
+    return load_montage(fl_montage).good_channels(radius)
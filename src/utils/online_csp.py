@@ -0,0 +1,214 @@
+from collections import namedtuple
+from time import perf_counter
+
+from numpy import asarray, zeros, log, arange, float64, r_
+
+# результат одного обновления декодера
+Decoded = namedtuple("Decoded", ["n_samples", "features", "output"])
+
+def default_components(n_channels, n_pairs=3):
+    """
+    Indices of the `n_pairs` first and last CSP components.
+    """
+    return r_[arange(n_pairs), arange(n_channels - n_pairs, n_channels)]
+
+def log_var_features(epochs, eigvecs, components=None, normalize=True):
+    """
+    Log-variance of CSP components for band-passed epochs (offline training).
+
+    The features equal those of :meth:`CSPDecoder.update` over a window of
+    the same length only if the signal was band-passed the same way, i.e.
+    causally (:func:`causal_filter` with the decoder's band and order).
+    Zero-phase filtered epochs (``filter_signal`` / ``sosfiltfilt``) give
+    close but not identical features: the magnitude response differs
+    (squared) and so does the phase.
+
+    Parameters
+    ----------
+    epochs : iterable of ndarray, shape (n_samples, n_channels)
+        Band-passed epochs (e.g. ``slice_epochs(causal_filter(eeg, fs, 8, 30), intervals, copy=False)``).
+    eigvecs : ndarray, shape (n_channels, n_filters)
+        CSP unmixing filters in columns (``W_fixed`` of ``calculate_CSP`` or
+        ``eigvecs`` of ``csp_from_covariances``).
+    components : list of int, optional
+        Columns of `eigvecs` to use. Default: 3 first and 3 last.
+    normalize : bool, optional
+        Divide the variances by their sum before the log.
+
+    Returns
+    -------
+    features : ndarray, shape (n_epochs, n_components)
+    """
+    eigvecs = asarray(eigvecs)
+    if components is None:
+        components = default_components(eigvecs.shape[1])
+    W = eigvecs[:, components]
+
+    features = []
+    for ep in epochs:
+        var = ((ep @ W) ** 2).mean(axis=0)
+        if normalize:
+            var = var / var.sum()
+        features.append(log(var))
+    return asarray(features)
+
+
+class CSPDecoder:
+    """
+    Online CSP + log-variance decoder for raw sample chunks.
+
+    Each chunk is projected onto the selected CSP filters, band-passed with
+    a causal Butterworth filter (second-order sections, state carried across
+    chunks) and squared into a ring buffer of the last `window_s` seconds.
+    The log-variance over that window is passed to the classifier.
+
+    Projection and filtering are both linear and the same filter is applied
+    to every channel, so filtering the few CSP components instead of all
+    channels gives the same result at a fraction of the cost.
+
+    Parameters
+    ----------
+    fs : float
+        Sampling frequency (Hz).
+    n_channels : int
+        Number of channels in the incoming chunks.
+    eigvecs : ndarray, shape (n_used_channels, n_filters)
+        CSP unmixing filters in columns.
+    band : [low, high], optional
+        Band-pass band (Hz), the one the CSP was trained on.
+    components : list of int, optional
+        Columns of `eigvecs` to use. Default: 3 first and 3 last.
+    channels : list or ndarray, optional
+        Channels of the chunk the CSP was trained on. Default: all.
+    order : int, optional
+        Order of the Butterworth filter. Default is 4.
+    window_s : float, optional
+        Length of the log-variance window (s).
+    normalize : bool, optional
+        See :func:`log_var_features`.
+    classifier : callable or estimator, optional
+        Maps features ``(n_components,)`` to an output; an object with
+        ``decision_function`` (e.g. sklearn LDA) is also accepted.
+        Default: no classifier, ``output`` is None.
+
+    Examples
+    --------
+    >>> eigvals, eigvecs, A = csp_from_covariances(C_motor, C_rest)
+    >>> decoder = CSPDecoder(fs=1000, n_channels=65, eigvecs=eigvecs, band=[8, 30],
+    ...                      channels=EEG_CHANNELS, classifier=lda)
+    >>> for chunk in stream_h5df(path, fs=1000, scale=1E6, pace=True):
+    ...     n, features, output = decoder.update(chunk.data)
+    """
+
+    def __init__(self, fs, n_channels, eigvecs, band=(8, 30), components=None, channels=None,
+                 order=4, window_s=1.0, normalize=True, classifier=None):
+        from src.utils.spectral_analysis import StreamingFilter
+
+        eigvecs = asarray(eigvecs, dtype=float64)
+        if components is None:
+            components = default_components(eigvecs.shape[1])
+        self.fs = fs
+        self.n_channels = n_channels
+        self.channels = channels
+        self.components = asarray(components)
+        self.W = eigvecs[:, self.components]
+        self.normalize = normalize
+        self.classifier = classifier
+
+        n_comp = self.W.shape[1]
+        # состояние фильтра - из первого отсчёта: без переходного процесса от постоянной составляющей
+        self._filter = StreamingFilter(fs, band[0], band[1], order, "band", steady_state=True)
+
+        self.n_window = int(round(window_s * fs))
+        self._buf = zeros((self.n_window, n_comp))      # квадраты отфильтрованных компонент
+        self._pos = 0
+        self.n_samples = 0
+
+    def reset(self):
+        self._filter.reset()
+        self._buf[:] = 0
+        self._pos = 0
+        self.n_samples = 0
+
+    def update(self, chunk):
+        """
+        Feed a chunk of raw samples.
+
+        Parameters
+        ----------
+        chunk : ndarray, shape (n_samples, n_channels)
+
+        Returns
+        -------
+        decoded : Decoded
+            ``(n_samples, features, output)``: total samples seen, log-variance
+            features over the last window (fewer samples until the window is
+            full) and the classifier output.
+        """
+        chunk = asarray(chunk)
+        if self.channels is not None:
+            chunk = chunk[:, self.channels]
+        if len(chunk) > 0:
+            y = self._filter.update(chunk @ self.W)
+            y **= 2
+            if len(y) > self.n_window:
+                y = y[-self.n_window:]
+            idx = (self._pos + arange(len(y))) % self.n_window
+            self._buf[idx] = y
+            self._pos = (self._pos + len(y)) % self.n_window
+            self.n_samples += len(chunk)
+
+        n_filled = min(self.n_samples, self.n_window)
+        if n_filled == 0:
+            return Decoded(0, None, None)
+        var = self._buf.sum(axis=0) / n_filled
+        if self.normalize:
+            var = var / var.sum()
+        features = log(var)
+        return Decoded(self.n_samples, features, self._classify(features))
+
+    def _classify(self, features):
+        if self.classifier is None:
+            return None
+        if hasattr(self.classifier, "decision_function"):
+            return self.classifier.decision_function(features[None])[0]
+        return self.classifier(features)
+
+    def decode(self, chunks):
+        """
+        Decode an iterable of chunks (arrays or :class:`Chunk`), yielding :class:`Decoded`.
+        """
+        for chunk in chunks:
+            yield self.update(getattr(chunk, "data", chunk))
+
+
+def replay_h5df(path, decoder, chunk_size=None, **kwargs):
+    """
+    Replay an HDF5 recording through a decoder, as a stand-in for the amplifier.
+
+    Parameters
+    ----------
+    path : str
+        Path to the HDF5 (.h5f) file.
+    decoder : CSPDecoder
+        Decoder fed with every chunk; its ``fs`` is used for pacing.
+    chunk_size : int or None, optional
+        See :func:`stream_h5df` (None: amplifier blocks).
+    **kwargs
+        Passed to :func:`stream_h5df` (``scale``, ``dtype``, ``pace``, ``speed``).
+
+    Yields
+    ------
+    chunk : Chunk
+        The replayed chunk.
+    decoded : Decoded
+        Decoder output after this chunk.
+    latency_s : float
+        Processing time of the chunk (s).
+    """
+    from src.utils.parse_h5df import stream_h5df
+
+    for chunk in stream_h5df(path, chunk_size=chunk_size, fs=decoder.fs, **kwargs):
+        t0 = perf_counter()
+        decoded = decoder.update(chunk.data)
+        yield chunk, decoded, perf_counter() - t0
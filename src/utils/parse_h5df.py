@@ -1,6 +1,12 @@
-from numpy import array, uint8
+from collections import namedtuple
+from time import perf_counter, sleep
+
+from numpy import array, asarray, uint8, unique, float64, cumsum, int64, searchsorted
 from h5py import File
 
+# один элемент потока: индекс первого отсчёта, данные и метки времени блока
+Chunk = namedtuple("Chunk", ["start", "data", "created", "received"])
+
 def load_h5df(path):
     """
     Load EEG data and block metadata from an HDF5 (.h5f) file.
@@ -25,6 +31,273 @@ def load_h5df(path):
 
     return data, blocks
 
+
+class H5Recording:
+    """
+    Lazy EEG recording backed by the ``eeg/data`` dataset of an HDF5 file.
+
+    Nothing is read on construction except the (small) ``eeg/blocks`` table.
+    Each call to :meth:`read` pulls only the requested hyperslab
+    (channel subset x sample range) from disk, so selecting 12 channels
+    out of 64 or one minute out of an hour costs only that much memory.
+
+    As in :func:`load_h5df`, the last sample of the dataset is dropped.
+
+    Parameters
+    ----------
+    path : str
+        Path to the HDF5 (.h5f) file.
+    fs : float or None, optional
+        Sampling frequency in Hz. Required only for :meth:`read_seconds`.
+
+    Examples
+    --------
+    >>> with H5Recording(path, fs=1000) as rec:
+    ...     raw_eeg = rec.read(channels=arange(12), scale=1E6)    # uV
+    ...     ttl = rec.read(channels=-1)
+    """
+
+    def __init__(self, path, fs=None):
+        self.path = path
+        self.fs = fs
+        self._h5f = File(path, "r")
+        self._data = self._h5f["eeg"]["data"]
+        self.blocks = self._h5f["eeg"]["blocks"][:]
+
+    @property
+    def n_samples(self):
+        return self._data.shape[0] - 1
+
+    @property
+    def n_channels(self):
+        return self._data.shape[1]
+
+    @property
+    def shape(self):
+        return self.n_samples, self.n_channels
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    def read(self, channels=None, start=None, stop=None, scale=1.0, dtype=None):
+        """
+        Read a channel subset and a sample range from disk.
+
+        Parameters
+        ----------
+        channels : int, sequence of ints or None, optional
+            Channel indices (negative indices allowed). If an int is given,
+            a 1D array is returned. Default: all channels.
+        start, stop : int or None, optional
+            Sample range with the usual slice semantics (negative values
+            count from the end of the recording).
+        scale : float, optional
+            Factor applied in place after reading (e.g. 1E6 for V -> uV).
+        dtype : dtype or None, optional
+            Output dtype. Default: dataset dtype, or float64 if ``scale``
+            is not 1 and the dataset is an integer type.
+
+        Returns
+        -------
+        data : ndarray, shape (n_samples, n_channels) or (n_samples,)
+            Requested part of the signal.
+        """
+        start, stop, _ = slice(start, stop).indices(self.n_samples)
+        stop = max(start, stop)
+
+        squeeze = channels is not None and asarray(channels).ndim == 0
+        out = self._read_channels(channels, start, stop)
+
+        if dtype is None and scale != 1 and out.dtype.kind in "iub":
+            dtype = float64
+        if dtype is not None:
+            out = out.astype(dtype, copy=False)
+        if scale != 1:
+            out *= scale
+
+        return out[:, 0] if squeeze else out
+
+    def read_seconds(self, start_s, end_s, channels=None, scale=1.0, dtype=None):
+        """
+        Same as :meth:`read`, but with the range given in seconds.
+        """
+        if self.fs is None:
+            raise ValueError("fs must be set to read by seconds.")
+        start, stop = int(start_s * self.fs), int(end_s * self.fs)
+        return self.read(channels=channels, start=start, stop=stop, scale=scale, dtype=dtype)
+
+    def iter_blocks(self, channels=None, scale=1.0, dtype=None, pace=False, speed=1.0, read_size=None):
+        """
+        Iterate over the recording block by block, as it came off the amplifier.
+
+        Block boundaries and timestamps come from the ``eeg/blocks`` table.
+        Consecutive blocks are read from disk together (``read_size`` samples
+        at a time) and yielded as views, so memory stays bounded by
+        ``read_size`` regardless of the file length.
+
+        Parameters
+        ----------
+        channels, scale, dtype
+            See :meth:`read`.
+        pace : bool, optional
+            If True, replay in real time: each block is yielded no earlier
+            than its last sample would have been acquired. Requires ``fs``.
+        speed : float, optional
+            Replay speed factor for ``pace=True`` (2.0 = twice as fast).
+        read_size : int or None, optional
+            Approximate number of samples per disk read. Default: 1 s of data
+            (or 1000 samples if ``fs`` is not set).
+
+        Yields
+        ------
+        chunk : Chunk
+            ``(start, data, created, received)`` for every non-empty block.
+            Samples not covered by ``eeg/blocks`` come last as one chunk
+            with ``created`` and ``received`` set to None.
+        """
+        counts = self.blocks["samples"].astype(int64)
+        ends = cumsum(counts)
+        starts = ends - counts
+        n_blocks, n_samples = len(counts), self.n_samples
+        if read_size is None:
+            read_size = int(self.fs) if self.fs else 1000
+        pacer = _Pacer(self.fs, speed) if pace else None
+
+        i = 0
+        while i < n_blocks and starts[i] < n_samples:
+            # группа блоков, которые прочитаем с диска за один раз
+            j = min(max(int(searchsorted(ends, starts[i] + read_size, side="right")), i + 1), n_blocks)
+            buf_start, buf_stop = int(starts[i]), int(min(ends[j - 1], n_samples))
+            buf = self.read(channels, buf_start, buf_stop, scale=scale, dtype=dtype)
+
+            for k in range(i, j):
+                start, stop = int(starts[k]), int(min(ends[k], n_samples))
+                if start >= stop:       # пустой блок (или блок за концом данных)
+                    continue
+                if pacer is not None:
+                    pacer.wait(stop)
+                yield Chunk(start, buf[start - buf_start:stop - buf_start],
+                            int(self.blocks["created"][k]), int(self.blocks["received"][k]))
+            i = j
+
+        # отсчёты после последнего блока таблицы - одним куском без меток времени
+        tail_start = int(ends[-1]) if n_blocks else 0
+        if tail_start < n_samples:
+            if pacer is not None:
+                pacer.wait(n_samples)
+            yield Chunk(tail_start, self.read(channels, tail_start, n_samples, scale=scale, dtype=dtype), None, None)
+
+    def iter_chunks(self, chunk_size, channels=None, scale=1.0, dtype=None, pace=False, speed=1.0):
+        """
+        Iterate over the recording in fixed-size chunks.
+
+        Parameters
+        ----------
+        chunk_size : int
+            Number of samples per chunk (the last one may be shorter).
+        channels, scale, dtype
+            See :meth:`read`.
+        pace, speed
+            See :meth:`iter_blocks`.
+
+        Yields
+        ------
+        chunk : Chunk
+            ``(start, data, created, received)``; the timestamps are those of
+            the block containing the last sample of the chunk, i.e. the moment
+            the whole chunk became available (None if ``eeg/blocks`` does not
+            cover it).
+        """
+        ends = cumsum(self.blocks["samples"].astype(int64))
+        n_samples = self.n_samples
+        pacer = _Pacer(self.fs, speed) if pace else None
+
+        for start in range(0, n_samples, chunk_size):
+            stop = min(start + chunk_size, n_samples)
+            data = self.read(channels, start, stop, scale=scale, dtype=dtype)
+
+            k = int(searchsorted(ends, stop, side="left"))    # блок с отсчётом stop-1
+            if k < len(ends):
+                created, received = int(self.blocks["created"][k]), int(self.blocks["received"][k])
+            else:
+                created, received = None, None
+
+            if pacer is not None:
+                pacer.wait(stop)
+            yield Chunk(start, data, created, received)
+
+    def _read_channels(self, channels, start, stop):
+        if channels is None:
+            return self._data[start:stop]
+
+        idx = asarray(channels).reshape(-1) % self.n_channels
+        uniq, inverse = unique(idx, return_inverse=True)
+
+        # непрерывный диапазон каналов читаем одним срезом
+        if uniq[-1] - uniq[0] + 1 == len(uniq):
+            block = self._data[start:stop, int(uniq[0]):int(uniq[-1]) + 1]
+        else:
+            block = self._data[start:stop, uniq.tolist()]   # h5py: индексы по возрастанию
+
+        if len(uniq) == len(idx) and (uniq == idx).all():
+            return block
+        return block[:, inverse]
+
+    def close(self):
+        self._h5f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Pacer:
+    """Sleeps until `n` samples would have been acquired at `fs * speed`."""
+
+    def __init__(self, fs, speed=1.0):
+        if fs is None:
+            raise ValueError("fs must be set for real-time pacing.")
+        self.rate = fs * speed
+        self.t0 = perf_counter()
+
+    def wait(self, n):
+        delay = self.t0 + n / self.rate - perf_counter()
+        if delay > 0:
+            sleep(delay)
+
+
+def stream_h5df(path, chunk_size=None, fs=None, **kwargs):
+    """
+    Open an HDF5 recording and stream it in bounded memory.
+
+    Parameters
+    ----------
+    path : str
+        Path to the HDF5 (.h5f) file.
+    chunk_size : int or None, optional
+        If None, yield the recording block by block (``eeg/blocks``),
+        otherwise in fixed chunks of `chunk_size` samples.
+    fs : float or None, optional
+        Sampling frequency in Hz (needed for ``pace=True``).
+    **kwargs
+        Passed to :meth:`H5Recording.iter_blocks` / :meth:`H5Recording.iter_chunks`
+        (``channels``, ``scale``, ``dtype``, ``pace``, ``speed``).
+
+    Yields
+    ------
+    chunk : Chunk
+        ``(start, data, created, received)``.
+    """
+    with H5Recording(path, fs=fs) as rec:
+        if chunk_size is None:
+            yield from rec.iter_blocks(**kwargs)
+        else:
+            yield from rec.iter_chunks(chunk_size, **kwargs)
+
+
 def ttl2binary(ttl_signal, bit_index=0):
     """
     Decode a binary signal from a TTL channel by selecting a specific bit.
@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+from collections import namedtuple
+
+Stage = namedtuple("Stage", ["name", "func", "deps", "sections", "params", "persist", "memo", "version",
+                             "fingerprint"])
+
+
+class MemoStore:
+    """
+    Memoized stage results: in memory for the session, optionally pickled to disk.
+
+    Parameters
+    ----------
+    cache_dir : str or None
+        Directory for persisted results. None: memory only.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self._memory = {}
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".pkl")
+
+    def get(self, key, persist=True):
+        """
+        Returns
+        -------
+        found : bool
+        value : object
+        """
+        if key in self._memory:
+            return True, self._memory[key]
+        if persist and self.cache_dir is not None:
+            try:
+                with open(self._path(key), "rb") as f:
+                    value = pickle.load(f)
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                return False, None
+            self._memory[key] = value
+            return True, value
+        return False, None
+
+    def put(self, key, value, persist=True):
+        self._memory[key] = value
+        if persist and self.cache_dir is not None:
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+
+    def clear_memory(self):
+        self._memory.clear()
+
+
+class Pipeline:
+    """
+    Graph of named stages with results memoized by inputs and parameters.
+
+    The key of a stage is a hash of its name, version, parameters (the
+    names it reads from its config sections), an optional fingerprint (e.g. the contents of the
+    input file) and the keys of the stages it depends on. Changing a
+    parameter therefore changes the key of that stage and of everything
+    downstream of it, and nothing else. Results are resolved lazily from
+    the targets: a stage whose result is memoized does not pull its inputs.
+
+    Examples
+    --------
+    >>> pipe = Pipeline()
+    >>> @pipe.stage("load", fingerprint=lambda p: file_digest(p["path"]), persist=False)
+    ... def load(params):
+    ...     ...
+    >>> @pipe.stage("filter", deps=["load"])
+    ... def filt(params, raw_eeg):
+    ...     return bandpass_filter(raw_eeg, fs=params["fs"], low=params["low"], high=params["high"])
+    >>> results = pipe.run(config, targets=["filter"], store=MemoStore("./.cache/pipeline"))
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.log = []
+
+    def stage(self, name, deps=(), sections=None, params=None, persist=True, memo=True, version=0, fingerprint=None):
+        """
+        Register a stage; use as a decorator.
+
+        Parameters
+        ----------
+        name : str
+            Stage name.
+        deps : sequence of str, optional
+            Stages whose results are passed to the function, in this order.
+        sections : sequence of str, optional
+            Config sections merged into the stage parameters (later ones
+            override earlier ones). Default: ``[name]``.
+        params : sequence of str, optional
+            Names of the parameters the stage reads. Only these are passed
+            to the function and hashed into the key, so other entries of
+            the same sections do not invalidate it. Default: whole sections.
+        persist : bool, optional
+            Save the result to disk (otherwise memory only, e.g. for raw data
+            that is cheaper to reload than to unpickle).
+        memo : bool, optional
+            Memoize at all; False for stages with side effects (plots).
+        version : int or str, optional
+            Bump to invalidate old results after changing the stage code.
+        fingerprint : callable, optional
+            ``params -> str`` added to the key, for inputs outside the
+            config (file contents).
+
+        The function is called as ``func(params, *dep_results)``.
+        """
+        def decorator(func):
+            self.stages[name] = Stage(name, func, tuple(deps), tuple(sections or (name,)),
+                                      None if params is None else tuple(params), persist, memo, version,
+                                      fingerprint)
+            return func
+        return decorator
+
+    def params(self, name, config):
+        stage = self.stages[name]
+        params = {}
+        for section in stage.sections:
+            params.update(config.get(section) or {})
+        if stage.params is not None:
+            params = {key: params[key] for key in stage.params if key in params}
+        return params
+
+    def keys(self, config, targets=None):
+        """
+        Keys of `targets` and all their upstream stages.
+        """
+        keys = {}
+
+        def resolve(name, path=()):
+            if name in keys:
+                return keys[name]
+            if name in path:
+                raise ValueError(f"cycle in pipeline: {' -> '.join(path + (name,))}")
+            stage = self.stages[name]
+            params = self.params(name, config)
+            payload = {"stage": name, "version": stage.version, "params": params,
+                       "deps": [resolve(dep, path + (name,)) for dep in stage.deps]}
+            if stage.fingerprint is not None:
+                payload["fingerprint"] = stage.fingerprint(params)
+            blob = json.dumps(payload, sort_keys=True, default=str).encode()
+            keys[name] = f"{name}-{hashlib.sha256(blob).hexdigest()[:32]}"
+            return keys[name]
+
+        for name in (targets or self.stages):
+            resolve(name)
+        return keys
+
+    def run(self, config, targets=None, store=None, force=()):
+        """
+        Compute `targets` (default: all stages), reusing memoized results.
+
+        Parameters
+        ----------
+        config : dict
+            Stage parameters by section.
+        targets : sequence of str, optional
+            Stages to produce.
+        store : MemoStore, optional
+            Where results are memoized; keep the same store between runs
+            in one session. Default: a new in-memory store.
+        force : sequence of str, optional
+            Stages to recompute even if memoized (their downstream stages
+            are recomputed too, as their inputs may differ).
+
+        Returns
+        -------
+        results : dict
+            Stage name -> result, for `targets`.
+        """
+        store = store if store is not None else MemoStore()
+        targets = list(targets or self.stages)
+        keys = self.keys(config, targets)
+        values = {}
+        self.log = []
+
+        def is_forced(name):
+            return name in force or any(is_forced(dep) for dep in self.stages[name].deps)
+
+        def compute(name):
+            if name in values:
+                return values[name]
+            stage = self.stages[name]
+            if stage.memo and not is_forced(name):
+                found, value = store.get(keys[name], persist=stage.persist)
+                if found:
+                    self.log.append({"stage": name, "key": keys[name], "cached": True, "time_s": 0.0})
+                    values[name] = value
+                    return value
+
+            inputs = [compute(dep) for dep in stage.deps]
+            t0 = time.perf_counter()
+            value = stage.func(self.params(name, config), *inputs)
+            elapsed = time.perf_counter() - t0
+            if stage.memo:
+                store.put(keys[name], value, persist=stage.persist)
+            self.log.append({"stage": name, "key": keys[name], "cached": False, "time_s": elapsed})
+            values[name] = value
+            return value
+
+        return {name: compute(name) for name in targets}
+
+    def report(self):
+        """
+        One line per stage of the last run: computed or reused, and time.
+        """
+        for entry in self.log:
+            status = "cached" if entry["cached"] else f"{entry['time_s']:.2f} s"
+            print(f"{entry['stage']:<12}{status}")
+
+
+def load_config(path):
+    """
+    Pipeline config from a JSON file.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
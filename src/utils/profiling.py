@@ -0,0 +1,283 @@
+import atexit
+import functools
+import importlib
+import inspect
+import json
+import os
+import pkgutil
+import sys
+import time
+
+from numpy import ndarray
+
+# переменная окружения: "1" - только сводка, иначе путь к логу (.jsonl / .json)
+ENV_VAR = "PIPELINE_PROFILE"
+
+class _State:
+    enabled = False
+    memory = False
+    log_file = None
+    json_path = None
+    t0 = 0.0
+    stack = []          # открытые стадии: [name, start_current, peak]
+    records = []
+
+_state = _State()
+
+def enable(log_path=None, memory=False):
+    """
+    Start collecting stage records.
+
+    Parameters
+    ----------
+    log_path : str or None, optional
+        Where to write the records: ``.json`` - one list written by
+        :func:`disable` (or at exit), anything else - JSON lines appended as
+        stages finish. Default: keep them in memory only.
+    memory : bool, optional
+        Track the peak allocation of each stage with ``tracemalloc``
+        (NumPy buffers included). Slows the run down noticeably.
+    """
+    import tracemalloc
+
+    _state.enabled = True
+    _state.memory = memory
+    _state.t0 = time.perf_counter()
+    _state.stack = []
+    _state.records = []
+    if log_path is not None:
+        if log_path.endswith(".json"):
+            _state.json_path = log_path
+        else:
+            _state.log_file = open(log_path, "a", encoding="utf-8")
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def disable():
+    """
+    Stop collecting, flush the log and return the records.
+    """
+    import tracemalloc
+
+    if _state.memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    if _state.log_file is not None:
+        _state.log_file.close()
+        _state.log_file = None
+    if _state.json_path is not None:
+        dump_json(_state.json_path)
+        _state.json_path = None
+    _state.enabled = False
+    return _state.records
+
+def is_enabled():
+    return _state.enabled
+
+def records():
+    return list(_state.records)
+
+def dump_json(path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(_state.records, f, indent=2)
+
+def _nbytes(objs):
+    return int(sum(obj.nbytes for obj in objs if isinstance(obj, ndarray)))
+
+def _shape(obj):
+    if isinstance(obj, ndarray):
+        return list(obj.shape)
+    if isinstance(obj, tuple):
+        return [_shape(o) for o in obj if isinstance(o, ndarray)] or None
+    return None
+
+
+class stage:
+    """
+    Time a block of code as a pipeline stage (no-op when profiling is disabled).
+
+    Examples
+    --------
+    >>> with profiling.stage("load"):
+    ...     raw_eeg = rec.read(channels=EEG_CHANNELS, scale=1E6)
+    """
+
+    __slots__ = ("name", "inputs", "outputs", "_active", "_t")
+
+    def __init__(self, name, inputs=()):
+        self.name = name
+        self.inputs = inputs
+        self.outputs = None
+        self._active = False
+
+    def __enter__(self):
+        if not _state.enabled:
+            return self
+        self._active = True
+        peak_start = 0
+        if _state.memory:
+            import tracemalloc
+
+            current, peak = tracemalloc.get_traced_memory()
+            for frame in _state.stack:          # пик внешних стадий не теряем
+                frame[2] = max(frame[2], peak)
+            tracemalloc.reset_peak()
+            peak_start = current
+        _state.stack.append([self.name, peak_start, peak_start])
+        self._t = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if not self._active:
+            return False
+        duration = time.perf_counter() - self._t
+        name, current_start, peak = _state.stack.pop()
+
+        record = {
+            "stage": name,
+            "depth": len(_state.stack),
+            "parent": _state.stack[-1][0] if _state.stack else None,
+            "start_s": self._t - _state.t0,
+            "duration_s": duration,
+            "in_bytes": _nbytes(self.inputs),
+            "out_bytes": _nbytes(self.outputs if isinstance(self.outputs, tuple) else (self.outputs,)),
+            "out_shape": _shape(self.outputs),
+            "error": exc[0].__name__ if exc[0] is not None else None,
+        }
+        if _state.memory:
+            import tracemalloc
+
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            if _state.stack:
+                _state.stack[-1][2] = max(_state.stack[-1][2], peak)
+            record["peak_mb"] = (peak - current_start) / 1024**2
+
+        _state.records.append(record)
+        if _state.log_file is not None:
+            _state.log_file.write(json.dumps(record) + "\n")
+            _state.log_file.flush()
+        return False
+
+
+def instrument(func, name=None):
+    """
+    Wrap `func` so that every call is recorded as a stage while profiling is enabled.
+
+    When disabled the wrapper only checks one flag before calling `func`.
+    """
+    if getattr(func, "__instrumented__", False):
+        return func
+    name = name or f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _state.enabled:
+            return func(*args, **kwargs)
+        with stage(name, inputs=args + tuple(kwargs.values())) as st:
+            out = func(*args, **kwargs)
+            st.outputs = out
+        return out
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+def instrument_module(module):
+    """
+    Replace the public functions defined in `module` with instrumented wrappers.
+
+    Calls between functions of the module go through the wrappers too,
+    so nested stages (e.g. ``bandpass_filter`` -> ``filter_signal``) are recorded.
+
+    Returns
+    -------
+    names : list of str
+        Wrapped function names.
+    """
+    names = []
+    for attr, obj in list(vars(module).items()):
+        if attr.startswith("_") or not inspect.isfunction(obj) or obj.__module__ != module.__name__:
+            continue
+        setattr(module, attr, instrument(obj))
+        names.append(attr)
+    return names
+
+def instrument_package(packages=("src.utils", "src.visualization")):
+    """
+    Instrument every module of `packages`.
+
+    Must run before the analysis script imports the functions by name
+    (``from src.utils.spectral_analysis import bandpass_filter``), otherwise
+    the script keeps references to the unwrapped functions. Modules whose
+    optional dependencies are missing are skipped.
+
+    Returns
+    -------
+    wrapped : dict
+        Module name -> wrapped function names.
+    """
+    wrapped = {}
+    for package_name in packages:
+        package = importlib.import_module(package_name)
+        for info in pkgutil.iter_modules(package.__path__, package_name + "."):
+            if info.name == __name__:
+                continue
+            try:
+                module = importlib.import_module(info.name)
+            except ImportError:
+                continue
+            wrapped[info.name] = instrument_module(module)
+    return wrapped
+
+def summary(file=None, min_depth=None):
+    """
+    Print a per-stage table: calls, total / mean time, share of the run, bytes, peak memory.
+    """
+    file = file or sys.stdout
+    recs = [r for r in _state.records if min_depth is None or r["depth"] >= min_depth]
+    if not recs:
+        print("no stages recorded", file=file)
+        return
+
+    total = sum(r["duration_s"] for r in _state.records if r["depth"] == 0)
+    stats = {}
+    for r in recs:
+        s = stats.setdefault(r["stage"], {"calls": 0, "time": 0.0, "out_bytes": 0, "peak_mb": None, "depth": r["depth"]})
+        s["calls"] += 1
+        s["time"] += r["duration_s"]
+        s["out_bytes"] = max(s["out_bytes"], r["out_bytes"])
+        s["depth"] = min(s["depth"], r["depth"])
+        if "peak_mb" in r:
+            s["peak_mb"] = max(s["peak_mb"] or 0.0, r["peak_mb"])
+
+    width = max(len(name) for name in stats) + 2
+    print(f"{'stage':<{width}}{'calls':>7}{'total [s]':>11}{'mean [s]':>10}{'share':>8}{'out [MB]':>10}{'peak [MB]':>11}",
+          file=file)
+    for name, s in sorted(stats.items(), key=lambda item: -item[1]["time"]):
+        share = f"{100 * s['time'] / total:.0f}%" if total > 0 and s["depth"] == 0 else ""
+        peak = f"{s['peak_mb']:.1f}" if s["peak_mb"] is not None else ""
+        print(f"{name:<{width}}{s['calls']:>7}{s['time']:>11.3f}{s['time'] / s['calls']:>10.3f}{share:>8}"
+              f"{s['out_bytes'] / 1024**2:>10.1f}{peak:>11}", file=file)
+
+def setup_from_env(packages=("src.utils", "src.visualization")):
+    """
+    Opt-in profiling of a script run through the ``PIPELINE_PROFILE`` variable.
+
+    ``PIPELINE_PROFILE=1`` prints the summary at exit; any other value is
+    the log path (see :func:`enable`). ``PIPELINE_PROFILE_MEMORY=1`` adds
+    peak-memory tracking. Unset: nothing is wrapped, no overhead at all.
+
+    Returns
+    -------
+    enabled : bool
+    """
+    value = os.environ.get(ENV_VAR)
+    if not value:
+        return False
+    instrument_package(packages)
+    enable(log_path=None if value == "1" else value, memory=os.environ.get(ENV_VAR + "_MEMORY") == "1")
+
+    def finish():
+        summary()
+        disable()
+
+    atexit.register(finish)
+    return True
@@ -1,4 +1,4 @@
-from numpy import asarray, eye, newaxis, ones, mean, integer, ndarray
+from numpy import asarray, eye, newaxis, ones, mean, integer, ndarray, zeros, atleast_1d, matmul, arange
 
 
 def rereference_eeg(eeg_data, ref_idx):
@@ -129,4 +129,119 @@ def apply_car(eeg_data, exclude_channels_idx=None):
     # вычитаем CAR
     eeg_car = eeg_data - car
 
-    return eeg_car
\ No newline at end of file
+    return eeg_car
+
+
+# ==================================
+# == composable spatial operators ==
+# ==================================
+#
+# Referencing, CAR, channel selection and CSP unmixing are all linear maps
+# over channels: data (n_samples, n_in) -> data @ M.T (n_samples, n_out).
+# They commute with (per-channel) band-pass filtering, so a chain can be
+# collapsed into one matrix and applied *before* filtering, e.g.
+#
+#     M = compose_operators(car_operator(64), csp_operator(eigvecs, [0, 1, 2, 3, -4, -3, -2, -1]))
+#     components = bandpass_filter(apply_spatial(raw_eeg, M), fs=Fs, low=8, high=30)   # 8 columns, not 64
+
+def reference_operator(n_channels, ref_idx):
+    """
+    Operator of :func:`rereference_eeg`: subtract the mean of the reference electrode(s).
+
+    Parameters
+    ----------
+    n_channels : int
+        Number of input channels.
+    ref_idx : int or sequence of ints
+        Index (or indices) of reference electrode(s) (0-based).
+
+    Returns
+    -------
+    M : ndarray, shape (n_channels, n_channels)
+    """
+    ref_idx = atleast_1d(ref_idx)
+    for idx in ref_idx:
+        if idx < -n_channels or idx >= n_channels:
+            raise ValueError(f"ref_idx ({idx}) is out of bounds for {n_channels} channels.")
+
+    ref = zeros(n_channels)
+    for idx in ref_idx:
+        ref[idx] += 1.0 / len(ref_idx)
+    return eye(n_channels) - ref[newaxis, :]
+
+def car_operator(n_channels, exclude_channels_idx=None):
+    """
+    Operator of :func:`apply_car`: subtract the average of the included channels.
+
+    Returns
+    -------
+    M : ndarray, shape (n_channels, n_channels)
+    """
+    include_mask = ones(n_channels, dtype=bool)
+    if exclude_channels_idx is not None:
+        include_mask[exclude_channels_idx] = False
+    return reference_operator(n_channels, arange(n_channels)[include_mask])
+
+def selection_operator(n_channels, channels):
+    """
+    Operator that keeps `channels` (in the given order).
+
+    Returns
+    -------
+    M : ndarray, shape (len(channels), n_channels)
+    """
+    return eye(n_channels)[channels]
+
+def csp_operator(eigvecs, components=None):
+    """
+    Operator that projects channels onto CSP components.
+
+    Parameters
+    ----------
+    eigvecs : ndarray, shape (n_channels, n_components)
+        Spatial filters in columns (``eigvecs`` of ``calculate_CSP_in_trials``
+        or ``W_fixed`` of ``calculate_CSP``).
+    components : sequence of ints, optional
+        Components to keep, e.g. ``[0, 1, 2, 3, -4, -3, -2, -1]``. Default: all.
+
+    Returns
+    -------
+    M : ndarray, shape (n_kept, n_channels)
+    """
+    eigvecs = asarray(eigvecs)
+    if components is not None:
+        eigvecs = eigvecs[:, components]
+    return eigvecs.T
+
+def compose_operators(*operators):
+    """
+    Collapse a chain of spatial operators into one matrix.
+
+    Operators are applied left to right: ``compose_operators(A, B)`` first
+    applies A, then B (i.e. returns ``B @ A``).
+    """
+    M = asarray(operators[0])
+    for op in operators[1:]:
+        M = asarray(op) @ M
+    return M
+
+def apply_spatial(eeg_data, operator, out=None):
+    """
+    Apply a spatial operator to EEG data in one matrix product.
+
+    Parameters
+    ----------
+    eeg_data : ndarray, shape (n_samples, n_in)
+        EEG signal.
+    operator : ndarray, shape (n_out, n_in)
+        Spatial operator (see :func:`compose_operators`).
+    out : ndarray, shape (n_samples, n_out), optional
+        Preallocated output.
+
+    Returns
+    -------
+    projected : ndarray, shape (n_samples, n_out)
+    """
+    eeg_data = asarray(eeg_data)
+    operator = asarray(operator, dtype=eeg_data.dtype if eeg_data.dtype.kind == "f" else None)
+    return matmul(eeg_data, operator.T, out=out)
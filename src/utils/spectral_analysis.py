@@ -1,5 +1,101 @@
+from functools import lru_cache
+import os
 
-def bandpass_filter(signal, fs, low=0.5, high=40.0, order=4):
+from numpy import asarray, empty, float64, ndarray, dtype as np_dtype, prod
+
+
+@lru_cache(maxsize=128)
+def design_filter(fs, low=None, high=None, order=4, btype="band"):
+    """
+    Design a Butterworth filter as second-order sections, memoized.
+
+    Designs are cached by (fs, low, high, order, btype), so sweeping bands
+    in a loop designs each filter only once. SOS form stays numerically
+    stable for narrow low bands (e.g. 0.5 Hz at fs=1000) where ``(b, a)``
+    coefficients are not.
+
+    Parameters
+    ----------
+    fs : float
+        Sampling frequency in Hz.
+    low, high : float or None
+        Cutoff frequencies in Hz (``low`` for 'highpass', ``high`` for
+        'lowpass', both for 'band' / 'bandstop').
+    order : int, optional
+        Order of the Butterworth filter. Default is 4.
+    btype : {'band', 'bandstop', 'lowpass', 'highpass'}, optional
+        Filter type. Default is 'band'.
+
+    Returns
+    -------
+    sos : ndarray, shape (n_sections, 6)
+        Read-only second-order sections.
+    """
+    from scipy.signal import butter
+
+    if btype in ("band", "bandpass", "bandstop"):
+        wn = [low, high]
+    elif btype in ("low", "lowpass"):
+        wn = high
+    else:
+        wn = low
+
+    sos = butter(order, wn, btype=btype, output="sos", fs=fs)
+    sos.flags.writeable = False
+    return sos
+
+def filter_signal(signal, fs, low=0.5, high=40.0, order=4, btype="band",
+                  dtype=None, out=None, channel_block=8):
+    """
+    Zero-phase Butterworth filtering with second-order sections.
+
+    Channels are filtered in blocks of `channel_block` and written into
+    `out`, so the temporary memory is bounded by one block, not by the
+    whole recording. ``out`` may be `signal` itself (in-place filtering).
+
+    Parameters
+    ----------
+    signal : array-like
+        Input signal. Can be 1D (n_samples,) or 2D (n_samples, n_channels).
+    fs : float
+        Sampling frequency in Hz.
+    low, high, order, btype
+        See :func:`design_filter`.
+    dtype : dtype or None, optional
+        Output dtype (e.g. float32). Default: ``out.dtype`` if `out` is
+        given, otherwise float64. Filtering itself is always done in
+        float64, one channel block at a time: a float32 IIR recursion loses
+        precision on DC-coupled (unfiltered) input.
+    out : ndarray or None, optional
+        Preallocated output with the same shape as `signal`.
+    channel_block : int, optional
+        Number of channels filtered at once.
+
+    Returns
+    -------
+    filtered_signal : ndarray
+        Filtered signal with the same shape as input (`out` if given).
+    """
+    from scipy.signal import sosfiltfilt
+
+    signal = asarray(signal)
+    if dtype is None:
+        dtype = out.dtype if out is not None else float64
+    if out is None:
+        out = empty(signal.shape, dtype=dtype)
+
+    sos = design_filter(fs, low, high, order, btype).copy()     # scipy needs a writable copy
+
+    n_samples = signal.shape[0]
+    x2d = signal.reshape(n_samples, -1)
+    out2d = out.reshape(n_samples, -1)
+    for ch in range(0, x2d.shape[1], channel_block):
+        block = x2d[:, ch:ch + channel_block].astype(float64, copy=False)
+        out2d[:, ch:ch + channel_block] = sosfiltfilt(sos, block, axis=0)     # приведение к dtype - при записи
+
+    return out
+
+def bandpass_filter(signal, fs, low=0.5, high=40.0, order=4, dtype=None, out=None):
     """
     Apply a bandpass Butterworth filter to a signal.
 
@@ -15,31 +111,321 @@ def bandpass_filter(signal, fs, low=0.5, high=40.0, order=4):
         High cutoff frequency in Hz. Default is 40.0 Hz.
     order : int, optional
         Order of the Butterworth filter. Default is 4.
+    dtype : dtype or None, optional
+        Output dtype, e.g. float32 (filtering is done in float64, see
+        :func:`filter_signal`). Default is float64.
+    out : ndarray or None, optional
+        Preallocated output buffer (may be `signal` itself).
 
     Returns
     -------
     filtered_signal : ndarray
         Bandpass-filtered signal with the same shape as input.
     """
+    return filter_signal(signal, fs, low=low, high=high, order=order, btype="band", dtype=dtype, out=out)
+
+class StreamingFilter:
+    """
+    Causal Butterworth filter (second-order sections) applied chunk by chunk.
+
+    The filter state is carried across :meth:`update` calls, so the
+    concatenated output of any chunking equals :func:`causal_filter` on the
+    whole signal, while memory is bounded by one chunk. With
+    ``steady_state=True`` the state is initialized from the first sample
+    (``sosfilt_zi``), as if the signal had been constant before it, which
+    removes the start-up transient of a DC offset.
+
+    Parameters
+    ----------
+    fs : float
+        Sampling frequency in Hz.
+    low, high, order, btype
+        See :func:`design_filter`.
+    dtype : dtype or None, optional
+        Computation/output dtype (e.g. float32). Default is float64.
+    steady_state : bool, optional
+        Initialize the state from the first sample; otherwise start from zeros.
+
+    Examples
+    --------
+    >>> filt = StreamingFilter(fs=1000, low=0.5, high=40)
+    >>> for chunk in stream_h5df(path, chunk_size=10000, scale=1E6):
+    ...     filtered = filt.update(chunk.data)
+    """
+
+    def __init__(self, fs, low=0.5, high=40.0, order=4, btype="band", dtype=None, steady_state=True):
+        self.fs = fs
+        self.dtype = dtype if dtype is not None else float64
+        self.steady_state = steady_state
+        self.sos = design_filter(fs, low, high, order, btype).astype(self.dtype)     # scipy needs a writable copy
+        self.zi = None
+        self.n_samples = 0
 
-    from scipy.signal import butter, filtfilt
+    def reset(self):
+        self.zi = None
+        self.n_samples = 0
 
-    nyquist = 0.5 * fs
-    low_norm = low / nyquist
-    high_norm = high / nyquist
+    def _init_state(self, x0):
+        from numpy import zeros
+        from scipy.signal import sosfilt_zi
 
-    b, a = butter(order, [low_norm, high_norm], btype='band')
-    filtered_signal = filtfilt(b, a, signal, axis=0)
+        if self.steady_state:
+            zi = sosfilt_zi(self.sos).astype(self.dtype)
+            self.zi = zi.reshape(zi.shape + (1,) * x0.ndim) * x0
+        else:
+            self.zi = zeros((self.sos.shape[0], 2) + x0.shape, dtype=self.dtype)
 
-    return filtered_signal
+    def update(self, chunk, out=None):
+        """
+        Filter the next chunk.
 
-def compute_psd_welch(data, fs, fmin=0.5, fmax=40.0, freq_res=0.5, nperseg=None):
+        Parameters
+        ----------
+        chunk : array-like, shape (n_samples,) or (n_samples, n_channels)
+            Consecutive samples; the channel layout must not change between calls.
+        out : ndarray or None, optional
+            Preallocated output with the same shape as `chunk`.
+
+        Returns
+        -------
+        filtered : ndarray
+            Filtered chunk (`out` if given).
+        """
+        from scipy.signal import sosfilt
+
+        chunk = asarray(chunk).astype(self.dtype, copy=False)
+        if len(chunk) == 0:
+            return chunk.copy() if out is None else out
+        if self.zi is None:
+            self._init_state(chunk[0])
+
+        y, self.zi = sosfilt(self.sos, chunk, axis=0, zi=self.zi)
+        self.n_samples += len(chunk)
+        if out is None:
+            return y
+        out[...] = y
+        return out
+
+def causal_filter(signal, fs, low=0.5, high=40.0, order=4, btype="band", dtype=None, steady_state=True):
+    """
+    One-shot causal Butterworth filtering; reference for :class:`StreamingFilter`.
+
+    Unlike :func:`filter_signal` (zero-phase, ``sosfiltfilt``) the output is
+    delayed by the filter's group delay, but it only depends on past samples.
+
+    Returns
+    -------
+    filtered_signal : ndarray
+        Filtered signal with the same shape as input.
+    """
+    return StreamingFilter(fs, low, high, order, btype, dtype, steady_state).update(signal)
+
+def shared_empty(shape, dtype=float64):
+    """
+    Allocate an ndarray in shared memory (``multiprocessing.shared_memory``).
+
+    Useful as the `out` buffer of :func:`filter_bank` when the filtered
+    bands are consumed by other processes, which attach to it by name.
+
+    Returns
+    -------
+    array : ndarray
+        Uninitialized array backed by the shared block.
+    shm : SharedMemory
+        The block; keep a reference while `array` is in use, then call
+        ``shm.close()`` and ``shm.unlink()``.
+    """
+    from multiprocessing.shared_memory import SharedMemory
+
+    nbytes = int(prod(shape)) * np_dtype(dtype).itemsize
+    shm = SharedMemory(create=True, size=max(nbytes, 1))
+    return ndarray(shape, dtype=dtype, buffer=shm.buf), shm
+
+def filter_bank(signal, fs, bands, order=4, dtype=None, out=None, n_jobs=None, channel_block=8):
+    """
+    Band-pass filter a signal in several bands concurrently.
+
+    Every (band, channel block) pair is an independent zero-phase SOS
+    filtering task; tasks run in a thread pool (SciPy's ``sosfilt``
+    releases the GIL) and write straight into one preallocated buffer.
+
+    Parameters
+    ----------
+    signal : array-like, shape (n_samples, n_channels)
+        Input signal.
+    fs : float
+        Sampling frequency in Hz.
+    bands : list of [low, high]
+        Pass bands in Hz, e.g. ``[[8, 30], [8, 12], [9, 13]]``.
+    order : int, optional
+        Order of the Butterworth filters. Default is 4.
+    dtype : dtype or None, optional
+        Output dtype. Default: ``out.dtype`` if given, otherwise float64.
+        Filtering is always done in float64 (see :func:`filter_signal`).
+    out : ndarray or None, optional
+        Preallocated buffer of shape (n_bands, n_samples, n_channels),
+        e.g. from :func:`shared_empty`.
+    n_jobs : int or None, optional
+        Number of worker threads. Default: number of CPU cores.
+    channel_block : int, optional
+        Number of channels per task.
+
+    Returns
+    -------
+    filtered : ndarray, shape (n_bands, n_samples, n_channels)
+        ``filtered[i]`` is the signal filtered in ``bands[i]``.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from scipy.signal import sosfiltfilt
+
+    signal = asarray(signal)
+    if dtype is None:
+        dtype = out.dtype if out is not None else float64
+    if out is None:
+        out = empty((len(bands),) + signal.shape, dtype=dtype)
+
+    n_samples = signal.shape[0]
+    x2d = signal.reshape(n_samples, -1)
+    out3d = out.reshape(len(bands), n_samples, -1)
+    soses = [design_filter(fs, low, high, order, "band").copy() for low, high in bands]
+
+    def run(task):
+        band_idx, ch = task
+        block = x2d[:, ch:ch + channel_block].astype(float64, copy=False)
+        out3d[band_idx, :, ch:ch + channel_block] = sosfiltfilt(soses[band_idx], block, axis=0)
+
+    tasks = [(i, ch) for i in range(len(bands)) for ch in range(0, x2d.shape[1], channel_block)]
+    with ThreadPoolExecutor(max_workers=n_jobs or os.cpu_count()) as executor:
+        for _ in executor.map(run, tasks):
+            pass
+
+    return out
+
+def decimation_ratio(fs, fs_out, max_denominator=1000):
+    """
+    ``(up, down)`` with ``fs * up / down == fs_out``.
+    """
+    from fractions import Fraction
+
+    ratio = Fraction(fs_out / fs).limit_denominator(max_denominator)
+    return ratio.numerator, ratio.denominator
+
+@lru_cache(maxsize=32)
+def design_decimation_filter(fs, fs_out, high=None, atten=60.0):
+    """
+    Linear-phase anti-aliasing FIR for :func:`decimate_signal`, memoized.
+
+    Designed at the upsampled rate ``fs * up`` (Kaiser window). Only the
+    band below `high` is protected: the stop band starts at
+    ``fs_out - high``, since anything above it aliases to frequencies above
+    `high`. This keeps the filter short (tens of taps per output sample
+    instead of hundreds for a cut-off right at the new Nyquist frequency).
+
+    Parameters
+    ----------
+    fs, fs_out : float
+        Input and output sampling frequencies (Hz).
+    high : float or None
+        Highest frequency that must stay alias-free (Hz). Default: 0.4 * fs_out.
+    atten : float
+        Stop-band attenuation (dB).
+
+    Returns
+    -------
+    h : ndarray
+        Read-only filter taps (odd length).
+    """
+    from scipy.signal import firwin, kaiserord
+
+    up, down = decimation_ratio(fs, fs_out)
+    if high is None:
+        high = 0.4 * fs_out
+    if high >= fs_out / 2:
+        raise ValueError(f"high={high} Hz must be below the Nyquist frequency of fs_out={fs_out} Hz.")
+
+    fs_up = fs * up
+    transition = fs_out - 2 * high              # от high до fs_out - high
+    numtaps, beta = kaiserord(atten, transition / (0.5 * fs_up))
+    numtaps += 1 - numtaps % 2       # нечётная длина: целая задержка, нулевая фаза
+    h = firwin(numtaps, fs_out / 2, window=("kaiser", beta), fs=fs_up)
+    h.flags.writeable = False
+    return h
+
+def decimate_signal(signal, fs, fs_out, low=None, high=None, order=4, atten=60.0,
+                    dtype=None, channel_block=8):
+    """
+    Band-limit and downsample: polyphase anti-aliasing, then band-pass at the new rate.
+
+    The full-rate signal is read once, by ``resample_poly`` with the short
+    FIR of :func:`design_decimation_filter`, which is evaluated only at the
+    output samples (zero-phase, delay compensated). With `low` the
+    zero-phase Butterworth band-pass (:func:`filter_signal`) then runs on
+    ``fs_out / fs`` of the samples. E.g. 8-30 Hz at 100 Hz for the mu
+    pipeline replaces ``bandpass_filter`` at 1 kHz.
+
+    Parameters
+    ----------
+    signal : array-like, shape (n_samples,) or (n_samples, n_channels)
+        Input signal.
+    fs, fs_out : float
+        Input and output sampling frequencies (Hz).
+    low : float or None, optional
+        Low cut-off of the band-pass (Hz). None: low-pass only.
+    high : float or None, optional
+        High cut-off (Hz); frequencies up to it are alias-free.
+        Default: 0.4 * fs_out.
+    order : int, optional
+        Order of the Butterworth band-pass.
+    atten : float, optional
+        Stop-band attenuation of the anti-aliasing filter (dB).
+    dtype : dtype or None, optional
+        Output dtype. Default is float64.
+    channel_block : int, optional
+        Number of channels processed at once.
+
+    Returns
+    -------
+    decimated : ndarray, shape (ceil(n_samples * fs_out / fs), ...)
+        Output at `fs_out`. Without `low`, the band between `high` and
+        ``fs_out / 2`` is a transition zone and may hold aliases. Convert
+        event/epoch indices with :func:`src.utils.events.resample_events` /
+        ``resample_intervals``.
+    """
+    from scipy.signal import resample_poly
+
+    signal = asarray(signal)
+    dtype = dtype if dtype is not None else float64
+    if high is None:
+        high = 0.4 * fs_out
+    up, down = decimation_ratio(fs, fs_out)
+    h = design_decimation_filter(fs, fs_out, high, atten)
+
+    n_samples = signal.shape[0]
+    n_out = -(-n_samples * up // down)
+    x2d = signal.reshape(n_samples, -1)
+    out = empty((n_out, x2d.shape[1]), dtype=dtype)
+    for ch in range(0, x2d.shape[1], channel_block):
+        out[:, ch:ch + channel_block] = resample_poly(x2d[:, ch:ch + channel_block], up, down, axis=0, window=h)
+
+    if low is not None:
+        filter_signal(out, fs_out, low=low, high=high, order=order, dtype=dtype, out=out,
+                      channel_block=channel_block)
+    return out.reshape((n_out,) + signal.shape[1:])
+
+def compute_psd_welch(data, fs, fmin=0.5, fmax=40.0, freq_res=0.5, nperseg=None, dtype=None, seg_block=64):
     """
     Compute power spectral density (PSD) using Welch's method.
 
+    All channels (and conditions, for 3D input) are processed in one
+    batched pass. Segments are taken as strided views, transformed
+    `seg_block` at a time, and only the bins inside [fmin, fmax] are
+    accumulated, so memory does not grow with the recording length.
+    Matches ``scipy.signal.welch`` (Hann window, 50% overlap, constant
+    detrend, one-sided density).
+
     Parameters
     ----------
-    data : ndarray, shape (n_samples, n_channels)
+    data : ndarray, shape (n_samples, n_channels) or (n_conditions, n_samples, n_channels)
         Continuous EEG/signal data.
     fs : float
         Sampling frequency (Hz).
@@ -52,49 +438,280 @@ def compute_psd_welch(data, fs, fmin=0.5, fmax=40.0, freq_res=0.5, nperseg=None)
         Determines nfft: nfft = fs / freq_res.
     nperseg : int or None
         Length of each Welch segment. If None, defaults to min(256, n_samples).
+    dtype : dtype or None, optional
+        Computation dtype, e.g. float32. Default: float32 for float32
+        input, float64 otherwise.
+    seg_block : int, optional
+        Number of segments transformed at once.
 
     Returns
     -------
     freqs : ndarray
         Frequency values in [fmin, fmax].
-    psd : ndarray, shape (n_channels, n_freqs)
+    psd : ndarray, shape (n_channels, n_freqs) or (n_conditions, n_channels, n_freqs)
         Power spectral density for each channel.
     """
+    from numpy import arange, ones, zeros, float32
+    from numpy.lib.stride_tricks import sliding_window_view
+    from scipy.fft import rfft
+    from scipy.signal import get_window
 
-    from scipy.signal import welch
-    from numpy import asarray
+    data = asarray(data)
+    if dtype is None:
+        dtype = float32 if data.dtype == float32 else float64
+    n_samples = data.shape[-2]
 
-    n_samples, n_channels = data.shape
-    
     # Определяем nfft для нужного разрешения по частоте
     nfft = int(fs / freq_res)
-    
     if nperseg is None:
-        nperseg = min(256, n_samples)
-    
-    psd_list = []
-    
-    for ch in range(n_channels):
-        freqs_all, psd_ch = welch(
-            data[:, ch],
-            fs=fs,
-            nperseg=nperseg,
-            nfft=nfft
-        )
-        # маска частот
-        freq_mask = (freqs_all >= fmin) & (freqs_all <= fmax)
-        psd_list.append(psd_ch[freq_mask])
-    
-    psd = asarray(psd_list)  # shape: (n_channels, n_freqs)
-    freqs = freqs_all[freq_mask]
-    
-    return freqs, psd
-  
-
-def compute_windowed_fft(data, fs=1000, channels=None, nperseg=1000, noverlap=100, window='hann'):
+        nperseg = 256
+    nperseg = min(nperseg, n_samples)
+    nfft = max(nfft, nperseg)
+    step = nperseg - nperseg // 2
+
+    # маска частот - один раз
+    freqs_all = arange(nfft // 2 + 1) * (fs / nfft)
+    freq_mask = (freqs_all >= fmin) & (freqs_all <= fmax)
+    bins = freq_mask.nonzero()[0]
+    onesided = ones(len(freqs_all), dtype=dtype) * 2
+    onesided[0] = 1
+    if nfft % 2 == 0:
+        onesided[-1] = 1
+
+    window = get_window("hann", nperseg).astype(dtype)
+    scale = onesided[bins] / (fs * (window ** 2).sum())
+
+    # (..., n_segments, n_channels, nperseg) - представление, без копирования
+    segments = sliding_window_view(data, nperseg, axis=-2)[..., ::step, :, :]
+    n_segments = segments.shape[-3]
+
+    acc = zeros(data.shape[:-2] + (data.shape[-1], len(bins)), dtype=dtype)
+    for start in range(0, n_segments, seg_block):
+        seg = segments[..., start:start + seg_block, :, :].astype(dtype)
+        seg -= seg.mean(axis=-1, keepdims=True)
+        seg *= window
+        spec = rfft(seg, n=nfft, axis=-1)[..., bins]
+        acc += (spec.real ** 2 + spec.imag ** 2).sum(axis=-3)
+
+    psd = acc * (scale / n_segments)
+    return freqs_all[freq_mask], psd
+
+def compute_psd_welch_intervals(data, fs, intervals, **kwargs):
+    """
+    Welch PSD of several intervals of one recording in one request.
+
+    Intervals of equal length are batched into a single call of
+    :func:`compute_psd_welch` (as a strided view when evenly spaced, e.g.
+    the opened/closed-eyes halves of a record).
+
+    Parameters
+    ----------
+    data : ndarray, shape (n_samples, n_channels)
+        Continuous EEG/signal data.
+    fs : float
+        Sampling frequency (Hz).
+    intervals : list of [start, end]
+        Sample intervals (inclusive start, exclusive end).
+    **kwargs
+        Passed to :func:`compute_psd_welch` (fmin, fmax, freq_res, ...).
+
+    Returns
+    -------
+    freqs : ndarray
+        Frequency values in [fmin, fmax].
+    psd : ndarray, shape (n_intervals, n_channels, n_freqs)
+        PSD of each interval.
+    """
+    from numpy import unique, stack
+    from src.utils.events import Epochs
+
+    epochs = Epochs(data, intervals)
+    lengths = epochs.lengths
+    psd = [None] * len(epochs)
+    freqs = None
+    for length in unique(lengths):
+        idx = (lengths == length).nonzero()[0]
+        freqs, psd_group = compute_psd_welch(epochs[idx].as_array(), fs, **kwargs)
+        for i, p in zip(idx, psd_group):
+            psd[i] = p
+
+    return freqs, stack(psd)
+
+class SpectrogramStream:
+    """
+    Incremental STFT power: consumes consecutive sample chunks and emits
+    finished spectrogram columns.
+
+    Only the requested channels and the bins inside [fmin, fmax] are kept,
+    optionally averaged over channels before storing, so memory is bounded
+    by one chunk regardless of the recording length. Columns are identical
+    to ``abs(scipy.signal.stft(..., boundary='zeros', padded=False))**2``.
+
+    Parameters
+    ----------
+    fs : float
+        Sampling frequency (Hz).
+    channels : list or ndarray, optional
+        Channels to include. Default: all channels.
+    nperseg : int
+        Segment length for STFT.
+    noverlap : int, optional
+        Overlap between segments. Default: nperseg//2.
+    window : str
+        Window type ('hann', 'hamming', etc.).
+    fmin, fmax : float or None, optional
+        Frequency range to keep (Hz). Default: 0 .. Nyquist.
+    average : bool, optional
+        If True, average power over `channels` (output has one channel).
+    dtype : dtype or None, optional
+        Computation/output dtype, e.g. float32. Default is float64.
+    seg_block : int, optional
+        Number of segments transformed at once.
+    nfft : int or None, optional
+        FFT length (segments are zero-padded to it). Default: `nperseg`.
+    """
+
+    def __init__(self, fs, channels=None, nperseg=1000, noverlap=100, window='hann',
+                 fmin=None, fmax=None, average=False, dtype=None, seg_block=128, nfft=None):
+        from numpy import arange, ones_like
+        from scipy.signal import get_window
+
+        if noverlap is None:
+            noverlap = nperseg // 2
+        self.fs = fs
+        self.channels = channels
+        self.nperseg = nperseg
+        self.nfft = nperseg if nfft is None else nfft
+        self.step = nperseg - noverlap
+        self.average = average
+        self.dtype = dtype if dtype is not None else float64
+        self.seg_block = seg_block
+
+        f = arange(self.nfft // 2 + 1) * (fs / self.nfft)
+        freq_mask = ones_like(f, dtype=bool)
+        if fmin is not None:
+            freq_mask &= f >= fmin
+        if fmax is not None:
+            freq_mask &= f <= fmax
+        self.f = f[freq_mask]
+        self._bins = freq_mask.nonzero()[0]
+
+        win = get_window(window, nperseg)
+        self._window = win.astype(self.dtype)
+        self._scale = 1.0 / win.sum() ** 2
+
+        self._buf = None
+        self._n_columns = 0
+        self.n_samples = 0
+        self._closed = False
+
+    def update(self, chunk):
+        """
+        Feed the next chunk of samples.
+
+        Parameters
+        ----------
+        chunk : ndarray, shape (n_samples, n_channels)
+
+        Returns
+        -------
+        t : ndarray
+            Times (s) of the new columns.
+        spectrogram : ndarray, shape (n_channels, n_freqs, n_new) or (1, n_freqs, n_new)
+            New columns (power).
+        """
+        from numpy import concatenate, zeros
+
+        if self._closed:
+            raise RuntimeError("stream is flushed; create a new one.")
+        chunk = asarray(chunk)
+        if self.channels is not None:
+            chunk = chunk[:, self.channels]
+        chunk = chunk.astype(self.dtype, copy=False)
+        self.n_samples += len(chunk)
+
+        if self._buf is None:     # boundary='zeros': nperseg//2 нулей в начале
+            self._buf = zeros((self.nperseg // 2, chunk.shape[1]), dtype=self.dtype)
+        return self._process(concatenate([self._buf, chunk]))
+
+    def flush(self):
+        """
+        Close the stream (zero boundary at the end) and return the last columns.
+        """
+        from numpy import concatenate, zeros
+
+        if self._buf is None:
+            raise RuntimeError("no data was fed to the stream.")
+        if self.n_samples < self.nperseg:
+            raise ValueError(f"nperseg = {self.nperseg} is greater than the input length = {self.n_samples}; "
+                             f"use compute_windowed_fft, which shortens the segment as scipy.signal.stft does.")
+        tail = zeros((self.nperseg // 2, self._buf.shape[1]), dtype=self.dtype)
+        out = self._process(concatenate([self._buf, tail]))
+        self._closed = True
+        return out
+
+    def _process(self, x):
+        from numpy import arange, empty
+        from numpy.lib.stride_tricks import sliding_window_view
+        from scipy.fft import rfft
+
+        n_new = (len(x) - self.nperseg) // self.step + 1 if len(x) >= self.nperseg else 0
+        n_ch = 1 if self.average else x.shape[1]
+        out = empty((n_new, n_ch, len(self._bins)), dtype=self.dtype)
+
+        if n_new > 0:
+            # (n_new, n_channels, nperseg) - представление, без копирования
+            segments = sliding_window_view(x, self.nperseg, axis=0)[::self.step][:n_new]
+            for start in range(0, n_new, self.seg_block):
+                seg = segments[start:start + self.seg_block] * self._window
+                spec = rfft(seg, n=self.nfft, axis=-1)[..., self._bins]
+                power = (spec.real ** 2 + spec.imag ** 2) * self._scale
+                out[start:start + self.seg_block] = power.mean(axis=1, keepdims=True) if self.average else power
+
+        t = (self._n_columns + arange(n_new)) * self.step / self.fs
+        self._n_columns += n_new
+        self._buf = x[n_new * self.step:].copy()
+        return t, out.transpose(1, 2, 0)
+
+def iter_windowed_fft(chunks, fs=1000, **kwargs):
+    """
+    Chunked spectrogram: yield STFT power columns as sample chunks arrive.
+
+    Parameters
+    ----------
+    chunks : iterable of ndarray, shape (n_samples, n_channels)
+        Consecutive pieces of a recording, e.g.
+        ``(c.data for c in stream_h5df(path, chunk_size=60000))``.
+    fs : float
+        Sampling frequency (Hz).
+    **kwargs
+        See :class:`SpectrogramStream`.
+
+    Yields
+    ------
+    t : ndarray
+        Times (s) of the new columns.
+    spectrogram : ndarray, shape (n_channels, n_freqs, n_new)
+        New columns (power); frequencies are ``SpectrogramStream.f``.
+    """
+    stream = SpectrogramStream(fs, **kwargs)
+    for chunk in chunks:
+        t, S = stream.update(chunk)
+        if len(t):
+            yield t, S
+    t, S = stream.flush()
+    if len(t):
+        yield t, S
+
+def compute_windowed_fft(data, fs=1000, channels=None, nperseg=1000, noverlap=100, window='hann',
+                         fmin=None, fmax=None, average=False, dtype=None, chunk_size=None):
     """
     Compute windowed FFT (STFT) for each channel.
 
+    All channels are transformed together (see :class:`SpectrogramStream`),
+    keeping only the bins in [fmin, fmax]; the data are processed in
+    chunks of `chunk_size` samples, so no full-size temporary is created.
+
     Parameters
     ----------
     data : ndarray, shape (n_samples, n_channels)
@@ -109,6 +726,15 @@ def compute_windowed_fft(data, fs=1000, channels=None, nperseg=1000, noverlap=10
         Overlap between segments. Default: nperseg//2.
     window : str
         Window type ('hann', 'hamming', etc.).
+    fmin, fmax : float or None, optional
+        Frequency range to keep (Hz). Default: all frequencies.
+    average : bool, optional
+        If True, average over `channels` before storing; the result then
+        has a single channel.
+    dtype : dtype or None, optional
+        Computation/output dtype, e.g. float32. Default is float64.
+    chunk_size : int or None, optional
+        Samples per processing chunk. Default: 64 segments.
 
     Returns
     -------
@@ -119,32 +745,23 @@ def compute_windowed_fft(data, fs=1000, channels=None, nperseg=1000, noverlap=10
     spectrograms : ndarray, shape (n_channels, n_freqs, n_times)
         Magnitude squared (power) of STFT for each channel.
     """
-    from numpy import asarray, arange, abs
-    from scipy.signal import stft
+    import warnings
+    from numpy import concatenate
 
     data = asarray(data)
-    n_samples, n_channels_total = data.shape
-    
-    if channels is None:
-        channels = arange(n_channels_total)
-    
-    if noverlap is None:
-        noverlap = nperseg // 2
-    
-    spectrograms = []
-
-    for ch in channels:
-        f, t, Zxx = stft(
-            data[:, ch],
-            fs=fs,
-            window=window,
-            nperseg=nperseg,
-            noverlap=noverlap,
-            nfft=nperseg,
-            padded=False
-        )
-        psd = abs(Zxx)**2
-        spectrograms.append(psd)
-
-    spectrograms = asarray(spectrograms)  # shape: (n_channels, n_freqs, n_times)
-    return f, t, spectrograms
\ No newline at end of file
+    nfft = nperseg
+    if 0 < len(data) < nperseg:     # как scipy.signal.stft: короче сегмент, nfft прежний
+        warnings.warn(f"nperseg = {nperseg} is greater than input length  = {len(data)}, "
+                      f"using nperseg = {len(data)}", UserWarning)
+        nperseg = len(data)
+    stream = SpectrogramStream(fs, channels=channels, nperseg=nperseg, noverlap=noverlap, window=window,
+                               fmin=fmin, fmax=fmax, average=average, dtype=dtype, nfft=nfft)
+    if chunk_size is None:
+        chunk_size = 64 * stream.step
+
+    parts = [stream.update(data[start:start + chunk_size]) for start in range(0, max(len(data), 1), chunk_size)]
+    parts.append(stream.flush())
+
+    t = concatenate([p[0] for p in parts])
+    spectrograms = concatenate([p[1] for p in parts], axis=2)  # shape: (n_channels, n_freqs, n_times)
+    return stream.f, t, spectrograms
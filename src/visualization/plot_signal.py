@@ -1,16 +1,249 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
-def plot_signal(start_s, end_s, signal, s_to_idx, ch=None, plot=True):
-    start_idx, end_idx = s_to_idx(start_s), s_to_idx(end_s)
-    plt.figure(figsize=(15, 3))
-    signal2plot = signal[start_idx:end_idx] if ch is None else signal[ch, start_idx:end_idx]
-    plt.plot(signal2plot)
-    ticks = np.arange(start_idx, end_idx, 1E4)
-    step_s = (end_s - start_s) / ticks.shape[0]
-    plt.xticks(ticks, np.arange(start_s, end_s, step_s).astype(int));
-    plt.xlabel("Time [s]")
-    plt.ylabel("Signal [uV]")
+def minmax_envelope(signal, n_bins, start=0, stop=None):
+    """
+    Min/max envelope of a signal segment, one (min, max) pair per bin.
+
+    Drawn as a line, the envelope looks the same as the full signal at a
+    width of `n_bins` pixels, since every pixel column shows the span
+    between the min and the max of its samples.
+
+    Parameters
+    ----------
+    signal : ndarray, shape (n_samples,) or (n_samples, n_channels)
+        Signal (may be a memmap; only [start, stop) is read).
+    n_bins : int
+        Number of bins (e.g. the axes width in pixels).
+    start, stop : int, optional
+        Sample range.
+
+    Returns
+    -------
+    idx : ndarray, shape (n_points,)
+        Sample index of every point.
+    env : ndarray, shape (n_points, n_channels)
+        Envelope values; min and max alternate.
+    """
+    seg = np.asarray(signal[start:stop])
+    seg = seg.reshape(len(seg), -1)
+    n = len(seg)
+    if n <= 2 * n_bins:
+        return start + np.arange(n), seg
+
+    bin_size = -(-n // n_bins)
+    n_full = n // bin_size
+    body = seg[:n_full * bin_size].reshape(n_full, bin_size, seg.shape[1])
+    mins, maxs = body.min(axis=1), body.max(axis=1)
+    bin_starts = np.arange(n_full) * bin_size
+    if n_full * bin_size < n:       # хвост - последний неполный бин
+        tail = seg[n_full * bin_size:]
+        mins = np.vstack([mins, tail.min(axis=0)])
+        maxs = np.vstack([maxs, tail.max(axis=0)])
+        bin_starts = np.append(bin_starts, n_full * bin_size)
+
+    env = np.empty((2 * len(mins), seg.shape[1]), dtype=seg.dtype)
+    env[0::2], env[1::2] = mins, maxs
+    bin_ends = np.minimum(bin_starts + bin_size, n) - 1
+    idx = np.empty(2 * len(bin_starts), dtype=np.int64)
+    idx[0::2], idx[1::2] = bin_starts, bin_ends
+    return start + idx, env
+
+def lttb(signal, n_out, start=0, stop=None):
+    """
+    Largest-Triangle-Three-Buckets downsampling, for all channels at once.
+
+    Keeps `n_out` actual samples per channel that preserve the visual
+    shape of the curve (peaks are kept, flat parts are thinned).
+
+    Parameters
+    ----------
+    signal : ndarray, shape (n_samples,) or (n_samples, n_channels)
+    n_out : int
+        Number of points per channel (>= 3).
+    start, stop : int, optional
+        Sample range.
+
+    Returns
+    -------
+    idx : ndarray, shape (n_points, n_channels)
+        Sample indices of the kept points (they differ between channels).
+    values : ndarray, shape (n_points, n_channels)
+    """
+    seg = np.asarray(signal[start:stop])
+    seg = seg.reshape(len(seg), -1)
+    n, n_ch = seg.shape
+    if n <= n_out or n_out < 3:
+        idx = np.arange(n)
+        return start + np.repeat(idx[:, None], n_ch, axis=1), seg
+
+    cols = np.arange(n_ch)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)     # n_out - 2 корзины между крайними точками
+    selected = np.empty((n_out, n_ch), dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = np.zeros(n_ch, dtype=np.int64)
+    for i in range(n_out - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_lo, next_hi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        next_hi = max(next_hi, next_lo + 1)
+        avg_x = (next_lo + next_hi - 1) / 2
+        avg_y = seg[next_lo:next_hi].mean(axis=0)
+
+        xs = np.arange(lo, hi)[:, None]
+        ys = seg[lo:hi]
+        ay = seg[a, cols]
+        area = np.abs((a - avg_x) * (ys - ay) - (a - xs) * (avg_y - ay))
+        a = lo + area.argmax(axis=0)
+        selected[i + 1] = a
+
+    return start + selected, seg[selected, cols]
+
+
+class SignalPlot:
+    """
+    Display-downsampled plot of a long multichannel signal.
+
+    Only the visible window is reduced to about one point pair per pixel
+    column (:func:`minmax_envelope`) or ``2 * width`` points
+    (:func:`lttb`), so drawing costs the same for a minute or an hour of
+    data. On zoom/pan (``xlim_changed``) the visible window is recomputed
+    at full detail.
+
+    Parameters
+    ----------
+    ax : matplotlib Axes
+    signal : ndarray, shape (n_samples, n_channels)
+        Signal (in memory or a memmap).
+    fs : float
+        Sampling frequency (Hz); the x axis is in seconds.
+    channels : list of int, optional
+        Channels to draw. Default: all.
+    labels : list of str, optional
+        Channel names (y tick labels when stacked, legend otherwise).
+    method : {"minmax", "lttb"}, optional
+        Downsampling method.
+    stacked : bool, optional
+        Draw channels one above another with a vertical `offset`.
+    offset : float, optional
+        Distance between stacked channels. Default: from the signal spread.
+    """
+
+    def __init__(self, ax, signal, fs, channels=None, labels=None, method="minmax", stacked=False, offset=None):
+        self.ax = ax
+        self.signal = signal
+        self.fs = fs
+        self.channels = None if channels is None else np.asarray(channels)
+        n_lines = signal.shape[1] if channels is None else len(self.channels)
+        self.method = method
+        self.n_samples = signal.shape[0]
+
+        if stacked and offset is None:
+            # разброс по прореженному сигналу, чтобы не читать всю запись
+            sample = self._columns(0, self.n_samples, step=max(1, self.n_samples // 100000))
+            spread = np.percentile(sample, 99, axis=0) - np.percentile(sample, 1, axis=0)
+            offset = float(np.median(spread)) * 1.5 or 1.0
+        # первый канал - сверху
+        self.offsets = (n_lines - 1 - np.arange(n_lines)) * offset if stacked else np.zeros(n_lines)
+
+        self.lines = [ax.plot([], [], lw=0.8)[0] for _ in range(n_lines)]
+        if labels is not None:
+            if stacked:
+                ax.set_yticks(self.offsets)
+                ax.set_yticklabels(labels)
+            else:
+                for line, label in zip(self.lines, labels):
+                    line.set_label(label)
+
+        # замыкание, а не bound method: matplotlib хранит на него сильную ссылку
+        ax.callbacks.connect("xlim_changed", lambda ax: self.update())
+
+    def _columns(self, start, stop, step=None):
+        seg = np.asarray(self.signal[start:stop:step])
+        return seg if self.channels is None else seg[:, self.channels]
+
+    def _width_px(self):
+        return max(int(self.ax.get_window_extent().width), 100)
+
+    def update(self):
+        """
+        Recompute the downsampled data for the current x limits.
+        """
+        x0, x1 = self.ax.get_xlim()
+        start = int(np.clip(np.floor(x0 * self.fs), 0, self.n_samples))
+        stop = int(np.clip(np.ceil(x1 * self.fs) + 1, start, self.n_samples))
+        if stop - start < 2:
+            return
+        seg = self._columns(start, stop)
+
+        if self.method == "lttb":
+            idx, values = lttb(seg, 2 * self._width_px())
+            for k, line in enumerate(self.lines):
+                line.set_data((start + idx[:, k]) / self.fs, values[:, k] + self.offsets[k])
+        else:
+            idx, env = minmax_envelope(seg, self._width_px())
+            t = (start + idx) / self.fs
+            for k, line in enumerate(self.lines):
+                line.set_data(t, env[:, k] + self.offsets[k])
+
+    def show_window(self, start_s, end_s):
+        """
+        Set the visible time window (s) and fit the y limits to it.
+        """
+        self.ax.set_xlim(start_s, end_s)        # вызывает update()
+        ys = np.concatenate([line.get_ydata() for line in self.lines])
+        if len(ys):
+            pad = 0.05 * (ys.max() - ys.min() or 1.0)
+            self.ax.set_ylim(ys.min() - pad, ys.max() + pad)
+
+
+def plot_signal(start_s, end_s, signal, s_to_idx, ch=None, plot=True, method="minmax",
+                stacked=False, offset=None, labels=None):
+    """
+    Plot a signal segment; long signals are drawn display-downsampled.
+
+    Parameters
+    ----------
+    start_s, end_s : float
+        Time window (s).
+    signal : ndarray, shape (n_samples, n_channels)
+        Signal.
+    s_to_idx : callable
+        Seconds -> sample index (defines the sampling frequency).
+    ch : int or list of int, optional
+        Channels to plot. Default: all.
+    plot : bool, optional
+        Call ``plt.show()``.
+    method : {"minmax", "lttb", None}, optional
+        Display downsampling (see :class:`SignalPlot`); None draws every sample.
+    stacked, offset, labels
+        See :class:`SignalPlot`.
+
+    Returns
+    -------
+    view : SignalPlot or None
+        Keeps the zoom callback; None if `method` is None.
+    """
+    fs = s_to_idx(1)
+    if signal.ndim == 1:
+        signal = signal[:, None]
+    channels = None if ch is None else np.atleast_1d(ch)
+    height = 3 if not stacked else max(3, 0.4 * (signal.shape[1] if channels is None else len(channels)))
+    fig, ax = plt.subplots(figsize=(15, height))
+
+    view = None
+    if method is None:
+        start_idx, end_idx = s_to_idx(start_s), s_to_idx(end_s)
+        signal2plot = signal[start_idx:end_idx] if channels is None else signal[start_idx:end_idx, channels]
+        ax.plot((start_idx + np.arange(len(signal2plot))) / fs, signal2plot)
+    else:
+        view = SignalPlot(ax, signal, fs, channels=channels, labels=labels, method=method,
+                          stacked=stacked, offset=offset)
+        view.show_window(start_s, end_s)
+
+    ax.set_xlabel("Time [s]")
+    ax.set_ylabel("Signal [uV]" if not stacked else "Channel")
+    if labels is not None and not stacked:
+        ax.legend(loc="upper right")
     if plot:
         plt.show()
-
+    return view